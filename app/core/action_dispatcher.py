@@ -1,29 +1,165 @@
+import os
+
+from app.core import document
+from app.core.command_parser import coerce_kwargs, kwarg_types, parse_command
+from app.core.command_queue import CommandQueue, Task, async_command
+
+
+# Script files for 'run --file='
+SCRIPT_EXTENSION = ".jdcmd"
+# Macros / scripts may run others; this stops a macro that runs itself
+MAX_RUN_DEPTH = 8
+
+
+def _alive(widget):
+    """False for None and for Qt objects whose C++ side was already deleted."""
+    if widget is None:
+        return False
+    try:
+        from PyQt6 import sip
+        return not sip.isdeleted(widget)
+    except (ImportError, TypeError):
+        return True
+
+
+class CommandError(Exception):
+    """A command that cannot run as given (unknown name, missing arguments, no target)."""
+
+
 class ActionDispatcher:
     def __init__(self, state_store):
         self.state_store = state_store
+        self.export_job = None
+        # Handlers marked @async_command run through this; status on 'commands.<name>'
+        self.queue = CommandQueue(on_status=self._publish_command_status)
+        self._run_depth = 0
+        # Set by the GUI: window_factory(workspace) opens another window on this state
+        self.window_factory = None
 
     def dispatch(self, cmd_obj):
         """
         Automatically routes 'command_name' to 'handle_command_name'.
         Example: 'state set ...' -> handle_state(cmd_obj)
+        Async handlers are queued ('<name> cancel' cancels them); all others
+        run right here, synchronously. Errors are printed; returns the
+        handler's result (None on error).
+        """
+        try:
+            return self.execute(cmd_obj)
+        except CommandError as e:
+            print(f"⚠️ {e}")
+        except Exception as e:
+            print(f"❌ Error executing '{cmd_obj.name}': {e}")
+
+    def execute(self, cmd_obj):
+        """
+        Like dispatch(), but errors are raised to the caller (CommandError
+        for commands that cannot run). Async commands return their queue
+        status instead of a result. Kwargs declared with @kwarg_types
+        arrive converted.
         """
         method_name = f"handle_{cmd_obj.name}"
-        
-        if hasattr(self, method_name):
-            handler = getattr(self, method_name)
+        handler = getattr(self, method_name, None)
+        if handler is None:
+            raise CommandError(f"Unknown Command: '{cmd_obj.name}' (No {method_name} found)")
+
+        declared = getattr(handler, "kwarg_types", None)
+        if declared:
             try:
-                handler(cmd_obj)
-            except Exception as e:
-                print(f"❌ Error executing '{cmd_obj.name}': {e}")
-        else:
-            print(f"⚠️ Unknown Command: '{cmd_obj.name}' (No {method_name} found)")
+                cmd_obj = coerce_kwargs(cmd_obj, declared)
+            except ValueError as e:
+                raise CommandError(str(e)) from None
+
+        spec = getattr(handler, "async_command", None)
+        if spec is not None:
+            if "cancel" in cmd_obj.args:
+                return {"cancelled": self.queue.cancel(cmd_obj.name)}
+            self.queue.submit(cmd_obj, handler, spec)
+            return {"queued": self.queue.pending(cmd_obj.name)}
+        return handler(cmd_obj)
+
+    def run_batch(self, lines, source="batch"):
+        """
+        Dispatches several command strings inside one state transaction, so
+        listeners see a single coalesced update once the batch is done.
+        Blank lines and '#' comments are skipped. Returns how many ran.
+        """
+        if self._run_depth >= MAX_RUN_DEPTH:
+            print(f"❌ {source}: nested too deep (run calls run more than {MAX_RUN_DEPTH} times)")
+            return 0
+
+        commands = []
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            cmd_obj = parse_command(line)
+            if cmd_obj is None:
+                print(f"⚠️ {source}:{number}: could not parse '{line}'")
+                continue
+            commands.append(cmd_obj)
+
+        self._run_depth += 1
+        try:
+            with self.state_store.transaction():
+                for cmd_obj in commands:
+                    self.dispatch(cmd_obj)
+        finally:
+            self._run_depth -= 1
+        return len(commands)
+
+    def _publish_command_status(self, name, status):
+        self.state_store.set(f"commands.{name}", status)
 
     # --- COMMAND HANDLERS ---
 
+    def handle_cancel(self, cmd):
+        """
+        Example: cancel --name=export, cancel --all
+        (same as 'export cancel' for a single async command)
+        """
+        name = cmd.kwargs.get("name")
+        if name is None and "all" not in cmd.flags:
+            raise CommandError("cancel: give --name=<command> or --all")
+        count = self.queue.cancel(name)
+        print(f"   -> Cancelled {count} command(s)")
+        return count
+
+    def handle_run(self, cmd):
+        """
+        Example: run --macro=reset          (a [macros] entry of the workspace)
+                 run --file=setup.jdcmd     (one command per line, '#' comments)
+        Every command of the batch runs inside a single state transaction.
+        """
+        name = cmd.kwargs.get("macro")
+        path = cmd.kwargs.get("file")
+        if name:
+            lines = (self.state_store.get("macros") or {}).get(name)
+            if lines is None:
+                raise CommandError(f"run: unknown macro '{name}'")
+            count = self.run_batch(lines, source=f"macro '{name}'")
+        elif path:
+            if not os.path.splitext(path)[1]:
+                path += SCRIPT_EXTENSION
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    lines = f.read().splitlines()
+            except OSError as e:
+                raise CommandError(f"run: cannot read '{path}': {e}") from e
+            count = self.run_batch(lines, source=path)
+        else:
+            raise CommandError("run: give --macro=<name> or --file=<script.jdcmd>")
+        print(f"   -> Ran {count} command(s) from {name or path}")
+        return count
+
+    @kwarg_types("math", val=float)
+    @kwarg_types("profile", budget=float)
     def handle_state(self, cmd):
         """
         Handles: state set --key=x --val=y
+        Handles: state get --key=x              (returns the value)
         Handles: state math --key=x --op=add --val=1
+        Handles: state profile --on --budget=2, state profile --off, state profile --dump=out.json
         """
         if "set" in cmd.args:
             key = cmd.kwargs.get("key")
@@ -32,10 +168,16 @@ class ActionDispatcher:
                 print(f"   -> State SET: {key} = {val}")
                 self.state_store.set(key, val)
 
+        elif "get" in cmd.args:
+            key = cmd.kwargs.get("key")
+            if not key:
+                raise CommandError("state get: missing --key")
+            return self.state_store.get(key)
+
         elif "math" in cmd.args:
             key = cmd.kwargs.get("key")
             op = cmd.kwargs.get("op")
-            val = float(cmd.kwargs.get("val", 1))
+            val = cmd.kwargs.get("val", 1.0)
             
             if key:
                 current = float(self.state_store.get(key, 0))
@@ -46,22 +188,48 @@ class ActionDispatcher:
                 
                 if new_val.is_integer(): new_val = int(new_val)
                 self.state_store.set(key, new_val)
+                return new_val
 
+        elif "profile" in cmd.args:
+            if "on" in cmd.flags:
+                self.state_store.enable_profiling(cmd.kwargs.get("budget", 4.0))
+
+            # Before --off: '--off --dump=out.json' writes what was recorded, then stops
+            out = cmd.kwargs.get("dump")
+            if out:
+                try:
+                    written = self.state_store.dump_profile(out)
+                except OSError as e:
+                    raise CommandError(f"state profile: cannot write '{out}': {e}") from e
+                if not written:
+                    raise CommandError("state profile: profiling is off, nothing to dump (start it with --on)")
+                print(f"   -> State profile written to {out}")
+
+            if "off" in cmd.flags:
+                self.state_store.disable_profiling()
+
+    @kwarg_types("move", x=int, y=int)
+    @kwarg_types("tool", size=float)
+    @kwarg_types("zoom", x=float, y=float, factor=float, to=float)
     def handle_canvas(self, cmd):
         """
         Example: canvas move --x=10 --y=20
+                 canvas tool --name=eraser --mode=split --size=8
+                 canvas tool --name=lasso, canvas tool --name=pen
+                 canvas delete            (removes the lasso selection)
+                 canvas zoom --factor=2   (around the centre, or --x=.. --y=.. widget px)
+                 canvas zoom --to=1, canvas zoom --reset
         """
         # Retrieve the python object reference
         canvas_widget = self.state_store.get("active_canvas_ref")
         
-        if not canvas_widget:
-            print("⚠️ No active canvas found to move.")
-            return
+        if not _alive(canvas_widget):
+            raise CommandError("No active canvas found to move.")
 
         if "move" in cmd.args:
             # Parse args with defaults
-            x = int(cmd.kwargs.get("x", 0))
-            y = int(cmd.kwargs.get("y", 0))
+            x = cmd.kwargs.get("x", 0)
+            y = cmd.kwargs.get("y", 0)
             animate = "animate" in cmd.flags
             
             # Call the method directly
@@ -72,10 +240,136 @@ class ActionDispatcher:
             except Exception as e:
                 print(f"❌ Canvas Move Error: {e}")
 
+        elif "tool" in cmd.args:
+            try:
+                canvas_widget.set_tool(cmd.kwargs.get("name", "pen"),
+                                       mode=cmd.kwargs.get("mode"), size=cmd.kwargs.get("size"))
+            except AttributeError:
+                print("⚠️ Active widget does not support 'set_tool'")
+
+        elif "zoom" in cmd.args:
+            anchor = None
+            if "x" in cmd.kwargs and "y" in cmd.kwargs:
+                from PyQt6.QtCore import QPointF
+                anchor = QPointF(cmd.kwargs["x"], cmd.kwargs["y"])
+            try:
+                if "reset" in cmd.flags:
+                    canvas_widget.set_zoom(1.0, anchor)
+                elif "to" in cmd.kwargs:
+                    canvas_widget.set_zoom(cmd.kwargs["to"], anchor)
+                else:
+                    canvas_widget.zoom_by(cmd.kwargs.get("factor", 2.0), anchor)
+            except AttributeError:
+                print("⚠️ Active widget does not support zoom")
+            return getattr(canvas_widget, "zoom", None)
+
+        elif "delete" in cmd.args:
+            try:
+                canvas_widget.delete_selection()
+            except AttributeError:
+                print("⚠️ Active widget does not support 'delete_selection'")
+
     def handle_app(self, cmd):
         """
         Example: app exit, app minimize
+                 app window --workspace=focus_mode   (another window, same document)
         """
         if "exit" in cmd.args:
             print("Requesting App Exit...")
             # sys.exit() or similar
+
+        elif "window" in cmd.args:
+            if self.window_factory is None:
+                raise CommandError("app window: no window system")
+            self.window_factory(cmd.kwargs.get("workspace"))
+
+    def handle_perf(self, cmd):
+        """
+        Example: perf toggle, perf on, perf off
+        Drives the 'perf_hud' state key the PerfHud overlay listens to.
+        """
+        if "on" in cmd.args:
+            self.state_store.set("perf_hud", True)
+        elif "off" in cmd.args:
+            self.state_store.set("perf_hud", False)
+        else:
+            self.state_store.set("perf_hud", not self.state_store.get("perf_hud", False))
+
+    @async_command(priority=10, coalesce=False)
+    def handle_document(self, cmd):
+        """
+        Example: document save --path=notes.jdraw
+                 document load --path=notes.jdraw
+        Reading / writing runs on a worker thread; the canvas keeps drawing.
+        """
+        path = cmd.kwargs.get("path")
+        if not path:
+            print("⚠️ document: missing --path")
+            return None
+        if not path.endswith(document.EXTENSION):
+            path += document.EXTENSION
+
+        if "save" in cmd.args:
+            # Snapshot of the stroke lists: drawing may append while we write
+            data = {i: list(strokes) for i, strokes in (self.state_store.get("canvas_data") or {}).items()}
+            return Task(document.save, path, data,
+                        done=lambda _: print(f"   -> Document saved to {path}"))
+        if "load" in cmd.args:
+            return Task(document.load, path, done=lambda data: self._document_loaded(path, data))
+        return None
+
+    def _document_loaded(self, path, data):
+        self.state_store.set("canvas_data", data)
+        self.state_store.set("active_line", 0)
+        print(f"   -> Document loaded from {path}")
+
+    @async_command(priority=0)
+    def handle_export(self, cmd):
+        """
+        Example: export svg --out=exports --lines=all
+                 export png --out=exports --lines=0,2-5 --scale=2 --workers=4
+                 export pdf --out=exports          (one page per line)
+                 export cancel
+        Runs on a worker thread that drives the command queue's process pool;
+        progress is published on the 'export_progress' state key.
+        """
+        # Imported on first use: multiprocessing is a noticeable part of startup
+        from app.core import exporter
+
+        fmt = cmd.args[0].lower() if cmd.args else "svg"
+        data = self.state_store.get("canvas_data") or {}
+        indices = document.parse_lines(cmd.kwargs.get("lines", "all"), data.keys(),
+                                       self.state_store.get("active_line", 0))
+
+        # --workers asks for a pool of that size; otherwise the queue's shared one is used
+        workers = cmd.kwargs.get("workers")
+        self.export_job = exporter.ExportJob(
+            fmt, [(i, list(data[i])) for i in indices],
+            cmd.kwargs.get("out", "exports"),
+            workers=workers,
+            scale=cmd.kwargs.get("scale", 1.0),
+            pool=None if workers else self.queue.process_pool(),
+        )
+        print(f"   -> Exporting {self.export_job.total} lines as {fmt} to {self.export_job.output}")
+        self._publish_export(self.export_job.progress())
+        return Task(self.export_job.run, pass_task=True, progress=self._publish_export,
+                    done=self._export_finished, cancel=self._export_cancelled)
+
+    def _export_cancelled(self):
+        # A running job notices the flag itself and ends through _export_finished
+        job = self.export_job
+        if job.started_at is None:
+            progress = job.progress()
+            progress.update(finished=True, cancelled=True)
+            self._publish_export(progress)
+
+    def _export_finished(self, progress):
+        self._publish_export(progress)
+        if progress["cancelled"]:
+            print(f"   -> Export cancelled after {progress['done']}/{progress['total']} lines")
+            return
+        print(f"   -> Exported {progress['done'] - progress['errors']}/{progress['total']} lines "
+              f"to {progress['out']} in {progress['elapsed']:.2f}s")
+
+    def _publish_export(self, progress):
+        self.state_store.set("export_progress", progress)
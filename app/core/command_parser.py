@@ -1,14 +1,74 @@
+import re
 import shlex
+from functools import lru_cache
+from types import MappingProxyType
+
+# Parsed commands are cached by their string; bindings and scripts repeat a few
+PARSE_CACHE_SIZE = 1024
+
+# Quotes, escapes, or whitespace that str.split() and shlex disagree on
+_NEEDS_SHLEX = re.compile(r"['\"\\]|[^\S \t\r\n]")
+
 
 class Command:
-    def __init__(self, name, args, kwargs, flags):
-        self.name = name       # The main command (e.g., "canvas")
-        self.args = args       # Positional args (e.g., ["move"])
-        self.kwargs = kwargs   # Key-value pairs (e.g., {"x": "-50"})
-        self.flags = flags     # Boolean flags (e.g., {"animate"})
+    """
+    A parsed command. Instances are shared through the parse cache, so they
+    are read-only: args is a tuple, kwargs a read-only mapping, flags a frozenset.
+    """
+    __slots__ = ("name", "args", "kwargs", "flags")
+
+    def __init__(self, name, args=(), kwargs=None, flags=()):
+        self.name = name                                # The main command (e.g., "canvas")
+        self.args = tuple(args)                         # Positional args (e.g., ("move",))
+        self.kwargs = MappingProxyType(dict(kwargs or {}))  # Key-value pairs (e.g., {"x": "-50"})
+        self.flags = frozenset(flags)                   # Boolean flags (e.g., {"animate"})
 
     def __repr__(self):
-        return f"<Cmd: {self.name} args={self.args} kwargs={self.kwargs} flags={self.flags}>"
+        return f"<Cmd: {self.name} args={list(self.args)} kwargs={dict(self.kwargs)} flags={set(self.flags)}>"
+
+    def coerced(self, kwarg_types):
+        """
+        A copy with the kwargs listed in kwarg_types ({key: type}) converted.
+        Raises ValueError naming the option when a value does not convert.
+        """
+        kwargs = dict(self.kwargs)
+        for key, kind in kwarg_types.items():
+            if key in kwargs:
+                try:
+                    kwargs[key] = kind(kwargs[key])
+                except (TypeError, ValueError):
+                    raise ValueError(f"{self.name}: --{key} expects {kind.__name__}, got '{kwargs[key]}'") from None
+        return Command(self.name, self.args, kwargs, self.flags)
+
+
+def kwarg_types(*subcommands, **types):
+    """
+    Declares how a handle_* method's kwargs are converted before it runs:
+
+        @kwarg_types("move", x=int, y=int)
+        @kwarg_types("zoom", x=float, y=float)
+        def handle_canvas(self, cmd): ...
+
+    With subcommands the types only apply when one of them is in cmd.args.
+    Stacked declarations are applied in order.
+    """
+    def mark(handler):
+        declared = getattr(handler, "kwarg_types", ())
+        handler.kwarg_types = declared + ((frozenset(subcommands), types),)
+        return handler
+    return mark
+
+
+def coerce_kwargs(cmd_obj, declared):
+    """Applies a handler's kwarg_types declarations to cmd_obj (returns a new Command if any apply)."""
+    types = {}
+    for subcommands, kinds in declared:
+        if not subcommands or not subcommands.isdisjoint(cmd_obj.args):
+            types.update(kinds)
+    if not types or types.keys().isdisjoint(cmd_obj.kwargs):
+        return cmd_obj
+    return cmd_obj.coerced(types)
+
 
 def parse_command(command_str: str) -> Command:
     """
@@ -18,13 +78,22 @@ def parse_command(command_str: str) -> Command:
     if not command_str:
         return None
 
-    # shlex handles quotes and splitting correctly (e.g., 'val with spaces')
     try:
-        tokens = shlex.split(command_str)
+        return _parse(command_str)
     except ValueError as e:
         print(f"Command Parse Error: {e}")
         return None
 
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse(command_str):
+    if _NEEDS_SHLEX.search(command_str):
+        # shlex handles quotes and splitting correctly (e.g., 'val with spaces')
+        tokens = shlex.split(command_str)
+    else:
+        # Same tokens as shlex for plain input, without its per-character lexer
+        tokens = command_str.split()
+
     if not tokens:
         return None
 
@@ -38,7 +107,7 @@ def parse_command(command_str: str) -> Command:
         if token.startswith("--"):
             # It is a flag or a key-value pair
             content = token[2:] # Strip '--'
-            
+
             if "=" in content:
                 # Handle --key=value
                 key, value = content.split("=", 1)
@@ -0,0 +1,310 @@
+"""
+Asynchronous command execution for the ActionDispatcher.
+
+Handlers decorated with @async_command are queued instead of run inline.
+When a command's turn comes, its handler runs on the GUI thread, reads what
+it needs from the state and returns a Task; the Task's work runs on a thread
+(or process) pool, and its progress / done / failed callbacks are delivered
+back on the GUI thread. Undecorated handlers keep the synchronous path.
+
+    @async_command(priority=5)
+    def handle_document(self, cmd):
+        data = snapshot(...)                       # GUI thread
+        return Task(write_file, path, data,        # worker
+                    done=lambda _: print("saved"))  # GUI thread
+
+Each command name has its own queue and runs one command at a time; a
+queued command identical to a newer one (name, args, kwargs and flags) is
+replaced by it (coalesced). Across names the highest priority runs first.
+"""
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Task.report() forwards at most one progress value per interval
+PROGRESS_INTERVAL = 0.03
+
+
+class AsyncSpec:
+    __slots__ = ("priority", "pool", "coalesce")
+
+    def __init__(self, priority=0, pool="thread", coalesce=True):
+        if pool not in ("thread", "process"):
+            raise ValueError(f"Unknown pool '{pool}' (expected 'thread' or 'process')")
+        self.priority = priority
+        self.pool = pool
+        self.coalesce = coalesce
+
+
+def spawn_pool(workers):
+    """A process pool whose workers are spawned: forking a process that runs Qt is unsafe."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def async_command(priority=0, pool="thread", coalesce=True):
+    """
+    Marks a handle_* method as asynchronous (see the module docstring).
+    pool="process" runs the work in a spawned process: the work function and
+    its arguments must be picklable, and it cannot report progress.
+    """
+    def mark(handler):
+        handler.async_command = AsyncSpec(priority, pool, coalesce)
+        return handler
+    return mark
+
+
+class Task:
+    """
+    Work returned by an async handler: work(*args) runs on the pool.
+
+    With pass_task=True thread work is called as work(task, *args), so it
+    can call task.report(value) to send progress to the GUI thread and poll
+    task.cancelled to stop early.
+    """
+    def __init__(self, work, *args, done=None, failed=None, progress=None, cancel=None, pass_task=False):
+        self.work = work
+        self.args = (self,) + args if pass_task else args
+        self.done = done          # done(result), GUI thread
+        self.failed = failed      # failed(exception), GUI thread
+        self.progress = progress  # progress(value), GUI thread
+        self.on_cancel = cancel   # cancel(), GUI thread, while running
+        self._cancelled = threading.Event()
+        self._post = None         # Set by the queue: marshals a call to the GUI thread
+        self._last_report = 0.0
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        if self.on_cancel is not None:
+            self.on_cancel()
+
+    def report(self, value, force=False):
+        if self.progress is None or self._post is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_report >= PROGRESS_INTERVAL:
+            self._last_report = now
+            self._post(self.progress, value)
+
+
+class _Entry:
+    __slots__ = ("cmd", "handler", "spec", "seq", "task", "future")
+
+    def __init__(self, cmd, handler, spec, seq):
+        self.cmd = cmd
+        self.handler = handler
+        self.spec = spec
+        self.seq = seq
+        self.task = None
+        self.future = None
+
+    @property
+    def key(self):
+        cmd = self.cmd
+        return (cmd.name, tuple(cmd.args), tuple(sorted(cmd.kwargs.items())), frozenset(cmd.flags))
+
+
+class CommandQueue:
+    """
+    Per-name queues in front of shared thread / process pools. All methods
+    are called on the GUI thread; pool callbacks are marshalled back to it
+    through a Qt signal (or run inline when there is no Qt application).
+
+    on_status(name, status) is called on every state change with a dict:
+    {"state": "queued|running|done|failed|cancelled", "queued": n, ...}.
+    """
+    def __init__(self, max_threads=None, max_processes=None, on_status=None):
+        self.max_threads = max_threads or max(2, os.cpu_count() or 1)
+        self.max_processes = max_processes or max(1, (os.cpu_count() or 1) - 1)
+        self.on_status = on_status
+
+        self.waiting = {}   # { name: deque[_Entry] }
+        self.running = {}   # { name: _Entry }
+        self._seq = itertools.count()
+        self._threads = None
+        self._processes = None
+        self._bridge = None
+        self._bridged = False
+
+    # --- Submission ---
+
+    def submit(self, cmd, handler, spec):
+        entry = _Entry(cmd, handler, spec, next(self._seq))
+        queue = self.waiting.setdefault(cmd.name, deque())
+        if spec.coalesce:
+            for i, queued in enumerate(queue):
+                if queued.key == entry.key:
+                    queue[i] = entry  # Same command queued again: one run, position is kept
+                    self._status(cmd.name, "queued", coalesced=True)
+                    self._pump()
+                    return
+        queue.append(entry)
+        self._status(cmd.name, "queued")
+        self._pump()
+
+    def cancel(self, name=None):
+        """Drops queued commands and cancels running ones (all names if None). Returns how many."""
+        names = [name] if name is not None else list(set(self.waiting) | set(self.running))
+        count = 0
+        for n in names:
+            queue = self.waiting.pop(n, None)
+            if queue:
+                count += len(queue)
+            entry = self.running.get(n)
+            if entry is not None and entry.task is not None:
+                count += 1
+                entry.task.cancel()
+                if entry.future is not None:
+                    # Only succeeds if it has not started; either way the done callback finishes it
+                    entry.future.cancel()
+            elif queue:
+                self._status(n, "cancelled")
+        return count
+
+    def pending(self, name=None):
+        if name is not None:
+            return len(self.waiting.get(name, ())) + (name in self.running)
+        return sum(len(q) for q in self.waiting.values()) + len(self.running)
+
+    def shutdown(self):
+        self.cancel()
+        for pool in (self._threads, self._processes):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._threads = self._processes = None
+
+    # --- Scheduling ---
+
+    def _pump(self):
+        while len(self.running) < self.max_threads:
+            ready = [q[0] for name, q in self.waiting.items() if q and name not in self.running]
+            if not ready:
+                return
+            entry = max(ready, key=lambda e: (e.spec.priority, -e.seq))
+            name = entry.cmd.name
+            self.waiting[name].popleft()
+            if not self.waiting[name]:
+                del self.waiting[name]
+            self._start(entry)
+
+    def _start(self, entry):
+        name = entry.cmd.name
+        try:
+            task = entry.handler(entry.cmd)
+        except Exception as e:
+            print(f"❌ Error executing '{name}': {e}")
+            self._status(name, "failed", error=str(e))
+            return
+        if task is None:
+            # Nothing to run in the background (e.g. invalid arguments)
+            self._status(name, "done")
+            return
+
+        if not self._bridged:
+            self._bridge = _make_bridge()  # On the GUI thread, which it must belong to
+            self._bridged = True
+        entry.task = task
+        task._post = self._post
+        self.running[name] = entry
+        try:
+            entry.future = self._pool(entry.spec.pool).submit(task.work, *task.args)
+        except Exception as e:
+            self.running.pop(name, None)
+            print(f"❌ Error executing '{name}': {e}")
+            self._status(name, "failed", error=str(e))
+            return
+        self._status(name, "running")
+        # Runs on a pool thread: hop to the GUI thread first
+        entry.future.add_done_callback(lambda future: self._post(self._finish, entry, future))
+
+    def _finish(self, entry, future):
+        name = entry.cmd.name
+        if self.running.get(name) is entry:
+            del self.running[name]
+        task = entry.task
+
+        if future.cancelled() or (task.cancelled and future.exception() is not None):
+            self._status(name, "cancelled")
+        elif future.exception() is not None:
+            error = future.exception()
+            print(f"❌ Error executing '{name}': {error}")
+            self._call(task.failed, error)
+            self._status(name, "failed", error=str(error))
+        else:
+            self._call(task.done, future.result())
+            self._status(name, "cancelled" if task.cancelled else "done")
+        self._pump()
+
+    def _call(self, callback, *args):
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"❌ Command callback error: {e}")
+
+    def process_pool(self):
+        """
+        The shared process pool, created on first use. Async commands with
+        pool="process" run on it; work that drives processes itself from a
+        worker thread (ExportJob) submits to it too.
+        """
+        if self._processes is not None and getattr(self._processes, "_broken", False):
+            # A worker died (BrokenProcessPool): later submissions get a fresh pool
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+        if self._processes is None:
+            self._processes = spawn_pool(self.max_processes)
+        return self._processes
+
+    def _pool(self, kind):
+        if kind == "process":
+            return self.process_pool()
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(self.max_threads, thread_name_prefix="command")
+        return self._threads
+
+    # --- GUI thread marshalling ---
+
+    def _post(self, fn, *args):
+        """Runs fn(*args) on the GUI thread (queued through a Qt signal)."""
+        if self._bridge is None:
+            fn(*args)  # No Qt application: nothing to marshal to
+        else:
+            self._bridge.posted.emit(fn, args)
+
+    def _status(self, name, state, **extra):
+        if self.on_status is None:
+            return
+        status = {"state": state, "queued": len(self.waiting.get(name, ()))}
+        status.update(extra)
+        self.on_status(name, status)
+
+
+def _make_bridge():
+    # Qt is imported here only: app.core stays importable without it
+    from PyQt6.QtCore import QObject, QCoreApplication, pyqtSignal
+
+    if QCoreApplication.instance() is None:
+        return None
+
+    class _Bridge(QObject):
+        posted = pyqtSignal(object, object)
+
+        def __init__(self):
+            super().__init__()
+            # Lives on the GUI thread, so emits from workers are queued to it
+            self.posted.connect(self._run)
+
+        def _run(self, fn, args):
+            fn(*args)
+
+    return _Bridge()
@@ -0,0 +1,112 @@
+"""
+Computed state keys.
+
+A computed function receives a tracking 'get(key, default=None)' and returns
+the value. Every key read through 'get' becomes a dependency, so the
+StateStore only re-runs the function after one of those keys changes.
+
+Workspace TOML can declare them too:
+
+    [computed]
+    status_line = "Line: $active_line | Strokes: $stroke_count"   # template
+    stroke_count = { fn = "len", args = ["current_strokes"] }     # function
+    line_bounds = { fn = "bounds", args = ["canvas_data.$active_line"] }
+"""
+import re
+
+VAR_PATTERN = re.compile(r'\$([a-zA-Z0-9_]+)')
+
+
+def template(text):
+    """Interpolates $vars from the store into text."""
+    # Sort keys by length (desc) to avoid partial replacement issues (e.g. $id inside $idx)
+    keys = sorted(set(VAR_PATTERN.findall(text)), key=len, reverse=True)
+
+    def compute(get):
+        final_text = text
+        for key in keys:
+            final_text = final_text.replace(f"${key}", str(get(key, "")))
+        return final_text
+    return compute
+
+
+def _resolve_arg(get, arg):
+    """A path argument, where $vars pick dynamic segments ('canvas_data.$active_line')."""
+    if not isinstance(arg, str):
+        return arg
+    if "$" in arg:
+        arg = VAR_PATTERN.sub(lambda m: str(get(m.group(1), 0)), arg)
+    return get(arg)
+
+
+# --- Registered functions (usable as 'fn' in TOML) ---
+
+def _value(v):
+    return v
+
+
+def _length(v):
+    return len(v) if v is not None else 0
+
+
+def _count_points(strokes):
+    return sum(len(s) for s in strokes) if strokes else 0
+
+
+def _bounds(strokes):
+    """(min_x, min_y, max_x, max_y) of a list of strokes, or None."""
+    if not strokes:
+        return None
+    min_x = min_y = float('inf')
+    max_x = max_y = float('-inf')
+    for stroke in strokes:
+        for p in stroke:
+            x, y = p.x(), p.y()
+            if x < min_x: min_x = x
+            if x > max_x: max_x = x
+            if y < min_y: min_y = y
+            if y > max_y: max_y = y
+    if min_x == float('inf'):
+        return None
+    return (min_x, min_y, max_x, max_y)
+
+
+FUNCTIONS = {
+    "value": _value,
+    "len": _length,
+    "count_points": _count_points,
+    "bounds": _bounds,
+}
+
+
+def function(name, args):
+    fn = FUNCTIONS.get(name)
+    if fn is None:
+        raise ValueError(f"Unknown computed function '{name}'")
+
+    def compute(get):
+        return fn(*(_resolve_arg(get, a) for a in args))
+    return compute
+
+
+def from_spec(spec):
+    """Builds a compute function from a TOML [computed] entry."""
+    if isinstance(spec, str):
+        return template(spec)
+    if isinstance(spec, dict) and "fn" in spec:
+        args = spec.get("args", [])
+        if isinstance(args, str): args = [args]
+        return function(spec["fn"], args)
+    raise ValueError(f"Invalid computed definition: {spec!r}")
+
+
+# --- Built-in keys ---
+
+def current_strokes(get):
+    """Stroke list of the active line, by reference (no copy)."""
+    try:
+        index = int(get("active_line", 0) or 0)
+    except (TypeError, ValueError):
+        index = 0
+    strokes = get(f"canvas_data.{index}")
+    return strokes if strokes is not None else []
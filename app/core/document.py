@@ -0,0 +1,103 @@
+"""
+.jdraw documents: the canvas_data lines as JSON.
+
+    {"format": "jdraw", "version": 1,
+     "lines": {"0": [{"points": [x0, y0, x1, y1, ...], "widths": [w0, w1, ...]}, ...]}}
+
+Reading and writing is plain Python. Only strokes_from_payload() touches Qt,
+lazily, to turn the plain data back into drawable Strokes.
+"""
+import json
+
+FORMAT = "jdraw"
+VERSION = 1
+EXTENSION = ".jdraw"
+
+
+def parse_lines(spec, available, active=None):
+    """
+    Line selection: 'all', 'active', or a list of indices and ranges ('0,3,5-9').
+    Returns the selected indices that exist, in order. Raises ValueError
+    for a malformed selection.
+    """
+    available = sorted(available)
+    spec = str(spec or "all").strip()
+    if spec == "all":
+        return available
+    if spec == "active":
+        try:
+            active = int(active)
+        except (TypeError, ValueError):
+            return []
+        return [active] if active in available else []
+
+    wanted = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        if not start.strip().isdigit() or (end and not end.strip().isdigit()):
+            raise ValueError(f"invalid line selection '{spec}' (expected all, active or e.g. 0,3,5-9)")
+        if end:
+            wanted.update(range(int(start), int(end) + 1))
+        else:
+            wanted.add(int(start))
+    return [i for i in available if i in wanted]
+
+
+def line_payload(strokes):
+    """Plain, cheaply picklable copy of a line: [(flat [x0, y0, x1, y1, ...], widths)]."""
+    payload = []
+    for stroke in strokes:
+        if not stroke:
+            continue
+        flat = []
+        for p in stroke:
+            flat.append(p.x())
+            flat.append(p.y())
+        widths = getattr(stroke, "widths", None)
+        payload.append((flat, list(widths) if widths else None))
+    return payload
+
+
+def strokes_from_payload(payload):
+    from PyQt6.QtCore import QPointF
+    from app.gui.components.stroke import Stroke
+
+    strokes = []
+    for flat, widths in payload:
+        points = [QPointF(flat[i], flat[i + 1]) for i in range(0, len(flat), 2)]
+        strokes.append(Stroke(points, widths))
+    return strokes
+
+
+def save(path, canvas_data):
+    lines = {}
+    for index, strokes in sorted((canvas_data or {}).items()):
+        lines[str(index)] = [
+            {"points": flat, "widths": widths} if widths else {"points": flat}
+            for flat, widths in line_payload(strokes or [])
+        ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"format": FORMAT, "version": VERSION, "lines": lines}, f, separators=(",", ":"))
+
+
+def load_payload(path):
+    """{ line index: payload } without creating any Qt objects."""
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    if doc.get("format") != FORMAT:
+        raise ValueError(f"{path} is not a {FORMAT} document")
+    if doc.get("version", 0) > VERSION:
+        raise ValueError(f"{path} was written by a newer version (v{doc['version']})")
+
+    return {
+        int(index): [(s["points"], s.get("widths")) for s in strokes]
+        for index, strokes in doc.get("lines", {}).items()
+    }
+
+
+def load(path):
+    """canvas_data ({ line index: [Stroke] }) read from path."""
+    return {index: strokes_from_payload(payload) for index, payload in load_payload(path).items()}
@@ -0,0 +1,91 @@
+"""
+The open notebook, shared by every view of it.
+
+Canvases, previews and line lists (in any number of windows sharing a
+StateStore) all read the same DocumentModel: its 'lines' dict is the store's
+'canvas_data', so strokes are drawn where they are and never copied. Each
+view keeps its own viewport (offset, zoom, active line).
+
+Edits go through the model and are published per line, so every view is
+notified once per changed line through 'canvas_data.<index>':
+
+    doc = DocumentModel.of(store)
+    doc.append(index, stroke)      # plain append: caches extend in place
+    doc.edited(index)              # strokes removed / replaced in place
+"""
+
+
+class DocumentModel:
+    def __init__(self, store=None, lines=None):
+        self.store = None
+        self.lines = lines if lines is not None else {}   # { line index: [Stroke] }
+        # Bumped on edits that are not plain appends, so every view's caches
+        # (tiles, onion layers, GL buffers, segment grids) know to rebuild
+        self.revisions = {}
+        self.views = []  # Live views, oldest first (see VectorCanvas.set_state_store)
+        if store is not None:
+            self.attach(store)
+
+    @classmethod
+    def of(cls, store):
+        """The store's document, created (around any existing 'canvas_data') on first use."""
+        doc = store.get("document")
+        if doc is None:
+            doc = cls(store)
+        return doc
+
+    def attach(self, store):
+        self.store = store
+        existing = store.get("canvas_data")
+        if isinstance(existing, dict):
+            self.lines = existing
+        store.set("document", self)
+        if existing is not self.lines:
+            store.set("canvas_data", self.lines)
+        # Lives as long as the store (it holds us under 'document')
+        store.subscribe("canvas_data", self._on_canvas_data)
+
+    def _on_canvas_data(self, data):
+        """'canvas_data' replaced from outside (e.g. 'document load'): adopt it."""
+        if data is self.lines or not isinstance(data, dict):
+            return
+        self.lines = data
+        for index in set(self.revisions) | set(data):
+            self.revisions[index] = self.revisions.get(index, 0) + 1
+
+    # --- Access ---
+
+    def line(self, index):
+        """The stroke list of a line, created empty if needed (views draw into it in place)."""
+        strokes = self.lines.get(index)
+        if strokes is None:
+            strokes = self.lines[index] = []
+        return strokes
+
+    def revision(self, index):
+        return self.revisions.get(index, 0)
+
+    # --- Edits ---
+
+    def append(self, index, stroke):
+        self.line(index).append(stroke)
+        self.publish(index)
+
+    def edited(self, index, publish=True):
+        """After strokes of a line were removed or replaced in place. Returns the new revision."""
+        revision = self.revisions[index] = self.revisions.get(index, 0) + 1
+        if publish:
+            self.publish(index)
+        return revision
+
+    def replace(self, lines):
+        """A whole new set of lines (every view resets)."""
+        if self.store is not None:
+            self.store.set("canvas_data", lines)
+        else:
+            self._on_canvas_data(lines)
+
+    def publish(self, index):
+        """Notifies the views of one line ('canvas_data.<index>' listeners)."""
+        if self.store is not None:
+            self.store.set(f"canvas_data.{index}", self.line(index))
@@ -0,0 +1,317 @@
+"""
+Line export (SVG / PNG / multi-page PDF).
+
+Lines are streamed to a process pool (the command queue's shared one, unless
+a worker count is asked for) one at a time: only a bounded window of lines is
+in flight, so a large notebook is never copied to the workers in one go. Workers receive plain (points, widths) data, rebuild the same outlines
+the canvas fills and return either a written file (SVG, PNG) or a compressed
+PDF page, which the caller appends to a single document in line order.
+
+ExportJob.run() drives the pool and blocks until the export is done, so it
+runs on a command-queue worker thread (see 'export' in ActionDispatcher),
+never on the GUI thread; progress and cancellation go through its Task.
+"""
+import os
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from app.core.command_queue import spawn_pool
+from app.core.document import line_payload, strokes_from_payload
+
+FORMATS = ("svg", "png", "pdf")
+PADDING = 10
+
+
+# --- Worker side (runs in the pool; Qt is imported lazily there) ---
+
+def _outlines(payload):
+    """Rebuilds the strokes' outlines and the padded bounds (x0, y0, x1, y1)."""
+    strokes = strokes_from_payload(payload)
+    rect = None
+    for stroke in strokes:
+        b = stroke.outline().boundingRect()
+        rect = b if rect is None else rect.united(b)
+    rect = rect.adjusted(-PADDING, -PADDING, PADDING, PADDING)
+    return strokes, (rect.left(), rect.top(), rect.right(), rect.bottom())
+
+
+def _path_segments(path):
+    """
+    Walks a QPainterPath as ('M', x, y) / ('L', x, y) / ('C', x1, y1, x2, y2, x, y)
+    tuples; the ellipse caps come out as cubic curves, which SVG and PDF share.
+    """
+    from PyQt6.QtGui import QPainterPath
+    MoveTo = QPainterPath.ElementType.MoveToElement
+    LineTo = QPainterPath.ElementType.LineToElement
+    CurveTo = QPainterPath.ElementType.CurveToElement
+
+    count = path.elementCount()
+    i = 0
+    while i < count:
+        e = path.elementAt(i)
+        if e.type == MoveTo:
+            yield ("M", e.x, e.y)
+            i += 1
+        elif e.type == LineTo:
+            yield ("L", e.x, e.y)
+            i += 1
+        elif e.type == CurveTo:
+            c2, end = path.elementAt(i + 1), path.elementAt(i + 2)
+            yield ("C", e.x, e.y, c2.x, c2.y, end.x, end.y)
+            i += 3
+        else:
+            i += 1
+
+
+def _svg(strokes, bounds):
+    x0, y0, x1, y1 = bounds
+    parts = []
+    for stroke in strokes:
+        d = []
+        for seg in _path_segments(stroke.outline()):
+            d.append(seg[0] + " ".join(f"{v:.2f}" for v in seg[1:]))
+        parts.append(f'<path d="{" ".join(d)}"/>')
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{x1 - x0:.0f}" height="{y1 - y0:.0f}" '
+        f'viewBox="{x0:.2f} {y0:.2f} {x1 - x0:.2f} {y1 - y0:.2f}">\n'
+        f'<g fill="black" fill-rule="nonzero">\n' + "\n".join(parts) + "\n</g>\n</svg>\n"
+    )
+
+
+def _pdf_page(strokes, bounds):
+    """Content stream of one page (1 px = 1 pt), flipped so y grows downward like the canvas."""
+    x0, y0, x1, y1 = bounds
+    ops = [f"1 0 0 -1 {-x0:.2f} {y1:.2f} cm", "0 g"]
+    for stroke in strokes:
+        for seg in _path_segments(stroke.outline()):
+            if seg[0] == "M":
+                ops.append(f"{seg[1]:.2f} {seg[2]:.2f} m")
+            elif seg[0] == "L":
+                ops.append(f"{seg[1]:.2f} {seg[2]:.2f} l")
+            else:
+                ops.append(" ".join(f"{v:.2f}" for v in seg[1:]) + " c")
+        ops.append("f")
+    return (x1 - x0, y1 - y0), zlib.compress("\n".join(ops).encode("ascii"))
+
+
+def _png(strokes, bounds, path, scale):
+    from PyQt6.QtGui import QImage, QPainter
+    from PyQt6.QtCore import Qt
+    from app.gui.components.stroke import draw_strokes
+
+    x0, y0, x1, y1 = bounds
+    image = QImage(max(1, int((x1 - x0) * scale)), max(1, int((y1 - y0) * scale)),
+                   QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(Qt.GlobalColor.white)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.scale(scale, scale)
+    painter.translate(-x0, -y0)
+    draw_strokes(painter, strokes)
+    painter.end()
+    if not image.save(path):
+        raise IOError(f"could not write {path}")
+
+
+def render_line(fmt, index, payload, out_dir, scale=1.0):
+    """
+    Pool entry point. Returns (index, result): the written file path for
+    svg / png, or ((width, height), compressed content stream) for pdf.
+    """
+    strokes, bounds = _outlines(payload)
+    if fmt == "pdf":
+        return index, _pdf_page(strokes, bounds)
+
+    path = os.path.join(out_dir, f"line_{index + 1:04d}.{fmt}")
+    if fmt == "svg":
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(_svg(strokes, bounds))
+    else:
+        _png(strokes, bounds, path, scale)
+    return index, path
+
+
+# --- Caller side ---
+
+class PdfWriter:
+    """Minimal streaming PDF: pages are written as they arrive, the page tree at close."""
+    def __init__(self, path):
+        self.f = open(path, "wb")
+        self.f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self.offsets = {}
+        self.pages = []
+        self.next_id = 3  # 1 = catalog, 2 = page tree
+
+    def _object(self, obj_id, body):
+        self.offsets[obj_id] = self.f.tell()
+        self.f.write(f"{obj_id} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+
+    def add_page(self, size, stream):
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._object(content_id, f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode("ascii")
+                     + stream + b"\nendstream")
+        w, h = size
+        self._object(page_id, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {w:.2f} {h:.2f}] "
+                              f"/Contents {content_id} 0 R >>".encode("ascii"))
+        self.pages.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{p} 0 R" for p in self.pages)
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>".encode("ascii"))
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref = self.f.tell()
+        count = self.next_id
+        self.f.write(f"xref\n0 {count}\n0000000000 65535 f \n".encode("ascii"))
+        for obj_id in range(1, count):
+            self.f.write(f"{self.offsets[obj_id]:010d} 00000 n \n".encode("ascii"))
+        self.f.write(f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii"))
+        self.f.close()
+
+
+class ExportJob:
+    """
+    One export run. start() opens a pool (unless a shared 'pool' was given,
+    which the job then leaves running), poll() collects finished lines,
+    tops the in-flight window back up and returns False once everything is
+    written. run() does both on the calling thread (a command queue worker).
+    """
+    def __init__(self, fmt, lines, out_dir, workers=None, scale=1.0, pool=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}' (expected {', '.join(FORMATS)})")
+        self.fmt = fmt
+        self.lines = [(i, s) for i, s in lines if s]
+        self.out_dir = out_dir
+        self.scale = float(scale)
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.window = self.workers * 4
+
+        self.pool = pool
+        self._owns_pool = pool is None  # A shared pool outlives the job
+        self._queue = iter(self.lines)
+        self._pending = set()
+        self._futures_index = {}  # { future: line index }
+        self._pages = {}          # PDF pages finished out of order: { position: page }
+        self._page_order = {}     # { index: position }
+        self._next_page = 0
+        self._pdf = None
+
+        self.total = len(self.lines)
+        self.done = 0
+        self.errors = []
+        self.finished = False
+        self.cancelled = False
+        self.started_at = None
+
+    @property
+    def output(self):
+        return os.path.join(self.out_dir, "lines.pdf") if self.fmt == "pdf" else self.out_dir
+
+    def start(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.started_at = time.perf_counter()
+        if self.fmt == "pdf":
+            self._pdf = PdfWriter(self.output)
+            self._page_order = {index: pos for pos, (index, _) in enumerate(self.lines)}
+        if self.pool is None:
+            self.pool = spawn_pool(self.workers)
+        self._fill()
+        return self
+
+    def run(self, task=None):
+        """
+        Runs the whole export, blocking: waits on the pool instead of being
+        polled. 'task' (a command_queue.Task) receives progress reports and
+        is checked for cancellation. Returns the final progress().
+        """
+        self.start()
+        while self.poll():
+            if task is not None:
+                if task.cancelled:
+                    self.cancel()
+                    break
+                task.report(self.progress())
+            wait(self._pending, timeout=0.1, return_when=FIRST_COMPLETED)
+        return self.progress()
+
+    def _fill(self):
+        while len(self._pending) < self.window:
+            try:
+                index, strokes = next(self._queue)
+            except StopIteration:
+                return
+            try:
+                future = self.pool.submit(
+                    render_line, self.fmt, index, line_payload(strokes), self.out_dir, self.scale)
+            except BrokenProcessPool as e:
+                print(f"❌ Export Error: {e}")
+                self.errors.append(str(e))
+                self._queue = iter(())
+                return
+            self._futures_index[future] = index
+            self._pending.add(future)
+
+    def poll(self):
+        if self.finished:
+            return False
+
+        for future in [f for f in self._pending if f.done()]:
+            self._pending.discard(future)
+            self.done += 1
+            index = self._futures_index.pop(future)
+            try:
+                _, result = future.result()
+            except Exception as e:
+                print(f"❌ Export Error (line {index + 1}): {e}")
+                self.errors.append(str(e))
+                result = None
+            if self._pdf is not None:
+                self._pages[self._page_order[index]] = result  # None: page skipped
+
+        self._flush_pages()
+        self._fill()
+
+        if not self._pending:
+            self._finish()
+            return False
+        return True
+
+    def _flush_pages(self):
+        # Pages are appended in line order; later lines wait for earlier ones
+        while self._pdf is not None and self._next_page in self._pages:
+            page = self._pages.pop(self._next_page)
+            if page is not None:
+                self._pdf.add_page(*page)
+            self._next_page += 1
+
+    def cancel(self):
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._futures_index.clear()
+        self.cancelled = True
+        self._finish()
+
+    def _finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        if self._pdf is not None:
+            self._pdf.close()
+        if self.pool is not None and self._owns_pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def progress(self):
+        return {
+            "format": self.fmt,
+            "done": self.done,
+            "total": self.total,
+            "errors": len(self.errors),
+            "out": self.output,
+            "finished": self.finished,
+            "cancelled": self.cancelled,
+            "elapsed": round(time.perf_counter() - self.started_at, 3) if self.started_at else 0.0,
+        }
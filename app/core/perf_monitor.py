@@ -0,0 +1,171 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+
+class _PaintStats:
+    def __init__(self):
+        self.count = 0
+        self.last_ms = 0.0
+        self.avg_ms = 0.0
+        self.max_ms = 0.0
+        self.frames = deque(maxlen=240)  # Timestamps of recent paints (for fps)
+
+    def add(self, now, elapsed_ms):
+        self.count += 1
+        self.last_ms = elapsed_ms
+        # Exponential moving average keeps the number readable while drawing
+        self.avg_ms = elapsed_ms if self.count == 1 else self.avg_ms * 0.9 + elapsed_ms * 0.1
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        self.frames.append(now)
+
+    def fps(self, now):
+        while self.frames and now - self.frames[0] > 1.0:
+            self.frames.popleft()
+        return len(self.frames)
+
+
+class PerfMonitor:
+    """
+    Collects paint timings, input latency and state notification counts.
+    Every hook starts with a single 'enabled' check, so a disabled monitor
+    costs one attribute lookup per paint / set.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self._paints = {}          # { "WidgetClass": _PaintStats }
+        self._notify = {}          # { "state_key": [notifications, max_fanout] }
+        self._pending_input = None # perf_counter() of the oldest unpainted input
+        self.latency_ms = 0.0
+        self.max_latency_ms = 0.0
+
+    def enable(self, on=True):
+        if on and not self.enabled:
+            self.reset()
+        self.enabled = bool(on)
+
+    # --- Hooks ---
+
+    def record_paint(self, name, elapsed_s):
+        now = time.perf_counter()
+        stats = self._paints.get(name)
+        if stats is None:
+            stats = self._paints[name] = _PaintStats()
+        stats.add(now, elapsed_s * 1000.0)
+
+    def record_notify(self, key, fanout):
+        entry = self._notify.get(key)
+        if entry is None:
+            self._notify[key] = [1, fanout]
+        else:
+            entry[0] += 1
+            if fanout > entry[1]:
+                entry[1] = fanout
+
+    def mark_input(self):
+        """Called when an input sample arrives. Only the oldest unpainted one counts."""
+        if self._pending_input is None:
+            self._pending_input = time.perf_counter()
+
+    def mark_input_painted(self):
+        """Called at the end of a paint that made pending input visible."""
+        if self._pending_input is None:
+            return
+        self.latency_ms = (time.perf_counter() - self._pending_input) * 1000.0
+        if self.latency_ms > self.max_latency_ms:
+            self.max_latency_ms = self.latency_ms
+        self._pending_input = None
+
+    # --- Reporting ---
+
+    def snapshot(self):
+        now = time.perf_counter()
+        return {
+            "paint": {
+                name: {
+                    "count": s.count,
+                    "fps": s.fps(now),
+                    "last_ms": round(s.last_ms, 3),
+                    "avg_ms": round(s.avg_ms, 3),
+                    "max_ms": round(s.max_ms, 3),
+                }
+                for name, s in self._paints.items()
+            },
+            "input_latency_ms": round(self.latency_ms, 3),
+            "max_input_latency_ms": round(self.max_latency_ms, 3),
+            "notify": {
+                key: {"count": count, "max_fanout": fanout}
+                for key, (count, fanout) in self._notify.items()
+            },
+        }
+
+
+class StartupProfile:
+    """
+    Timing breakdown of application startup ('main.py --profile-startup').
+    Phases and marks are no-ops until enable() is called.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.t0 = 0.0
+        self.entries = []  # [(label, duration_ms or None, at_ms)]
+        self.reported = False
+
+    def enable(self, t0=None):
+        self.enabled = True
+        self.t0 = time.perf_counter() if t0 is None else t0
+
+    def _at(self):
+        return (time.perf_counter() - self.t0) * 1000.0
+
+    @contextmanager
+    def phase(self, label):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.entries.append((label, (time.perf_counter() - start) * 1000.0, self._at()))
+
+    def mark(self, label):
+        """A point in time (e.g. first paint) rather than a duration."""
+        if self.enabled:
+            self.entries.append((label, None, self._at()))
+
+    def report(self):
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        print("⏱️ Startup profile (ms since main.py started)")
+        for label, duration, at in self.entries:
+            took = f"{duration:8.1f}" if duration is not None else "        "
+            print(f"   {label:<36}{took}   @ {at:7.1f}")
+
+
+# Process wide instances used by the instrumentation hooks
+monitor = PerfMonitor()
+startup = StartupProfile()
+
+
+def timed_paint(method):
+    """
+    Decorator for paintEvent (and QOpenGLWidget.paintGL) overrides. Records the
+    paint duration under the widget's class name while the monitor is enabled.
+    """
+    @wraps(method)
+    def wrapper(self, *args):
+        if not monitor.enabled:
+            return method(self, *args)
+        start = time.perf_counter()
+        try:
+            return method(self, *args)
+        finally:
+            monitor.record_paint(type(self).__name__, time.perf_counter() - start)
+    return wrapper
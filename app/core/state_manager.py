@@ -1,54 +1,566 @@
+import weakref
+from contextlib import contextmanager
+from functools import partial
+
+from app.core.perf_monitor import monitor
+from app.core.state_profiler import ListenerProfiler
+from app.core import state_paths
+from app.core.state_paths import MISSING
+
+
+class Subscription:
+    """
+    Handle returned by StateStore.subscribe().
+    Bound methods are held weakly; other callables are held strongly
+    and live as long as their owner (if any).
+    """
+    __slots__ = ("store", "key", "owner_id", "with_path", "_ref", "__weakref__")
+
+    def __init__(self, store, key, callback, owner_id, with_path=False):
+        self.store = store
+        self.key = key
+        self.owner_id = owner_id
+        self.with_path = with_path  # subscribe_path(): callback(path, value)
+        if hasattr(callback, "__self__") and hasattr(callback, "__func__"):
+            self._ref = weakref.WeakMethod(callback)
+        else:
+            self._ref = lambda: callback
+
+    @property
+    def callback(self):
+        """The live callback, or None once its object has been collected."""
+        return self._ref()
+
+    @property
+    def active(self):
+        return self.store is not None
+
+    def unsubscribe(self):
+        if self.store is not None:
+            self.store.unsubscribe(self)
+
+
+def _is_qobject(obj):
+    return hasattr(obj, "destroyed") and hasattr(obj.destroyed, "connect")
+
+
+class Selector:
+    """
+    Memoized derived value over one or more state paths (see StateStore.select).
+    fn only runs when an input path notifies, and callback only runs when the
+    result differs from the previous one.
+
+    The store's subscriptions hold it strongly: it lives until unsubscribe()
+    or, with an owner, until the owner is destroyed.
+    """
+    def __init__(self, store, inputs, fn, callback, owner=None):
+        self.inputs = list(inputs)
+        self.fn = fn
+        self.callback = callback
+        self.value = None
+        self._has_value = False
+        self._ready = False
+        # A closure, not the bound method (which subscriptions hold weakly)
+        on_input = lambda _=None: self._on_input()
+        self._subs = [store.subscribe(path, on_input, owner=owner) for path in self.inputs]
+        self._store = store
+        self._ready = True
+        self._on_input()
+
+    def _on_input(self, _=None):
+        if not self._ready:
+            return
+        result = self.fn(*(self._store.get(path) for path in self.inputs))
+        # Equal results are dropped, unless it is the same (possibly mutated) container
+        if self._has_value and result == self.value:
+            if not (result is self.value and isinstance(result, (list, dict, set))):
+                return
+        self.value = result
+        self._has_value = True
+        self.callback(result)
+
+    def unsubscribe(self):
+        for sub in self._subs:
+            sub.unsubscribe()
+        self._subs = []
+
+
+class _Computed:
+    __slots__ = ("fn", "deps", "value", "dirty", "busy")
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.deps = []
+        self.value = None
+        self.dirty = True
+        self.busy = False
+
+
+# Values of these types are compared before re-notifying a recomputed key
+_IMMUTABLE = (str, int, float, bool, tuple, frozenset, type(None))
+
+
 class StateStore:
+    """
+    Key/value state with change listeners.
+
+    Keys may be dotted paths into nested dicts/lists ('canvas_data.3').
+    Setting a path notifies listeners of that path, of its ancestors (their
+    container changed in place) and of its descendants whose slice was replaced.
+    Slices are compared by identity, so code that mutates data in place should
+    set the most specific path it touched.
+
+    Computed keys (define_computed) are evaluated lazily on read, cached, and
+    only invalidated when one of the keys they read changes.
+
+    Inside transaction() values are written at once but listeners are only
+    notified when it ends: once per key, with the final value.
+    """
     def __init__(self):
         self._data = {}
-        self._listeners = {} # { "variable_name": [callback_function, ...] }
+        self._listeners = {}      # { "variable_name": {Subscription: None, ...} } (ordered set)
+        self._path_listeners = {} # { "pattern.*": {Subscription: None, ...} }
+        self._nested = {}         # { root_key: {pattern: segments} } dotted / wildcard subscriptions
+        self._owners = {}         # { id(owner): [Subscription, ...] }
+        self._computed = {}       # { key: _Computed }
+        self._dependents = {}     # { root_key: { dep_path: {computed_key, ...} } }
+        self._profiler = None
+        self._batch = None        # { key: (segments, old value) } inside transaction()
+        self._stale = None        # { computed key: value before it went dirty } inside transaction()
 
     def get(self, key, default=None):
-        return self._data.get(key, default)
+        # Computed first: like set(), a computed key owns its name
+        comp = self._computed.get(key)
+        if comp is not None:
+            return self._evaluate(key, comp)
+        if key in self._data:
+            return self._data[key]
+        if "." in key:
+            value = state_paths.resolve(self._data, state_paths.split(key))
+            if value is not MISSING:
+                return value
+        return default
 
     def set(self, key, value):
         """
         Updates the state and notifies all listeners.
-        Removes dead listeners (deleted widgets) automatically.
-        """
-        self._data[key] = value
-        
-        if key in self._listeners:
-            # We create a new list for surviving listeners
-            active_listeners = []
-            
-            for callback in self._listeners[key]:
-                try:
-                    callback(value)
-                    # If it didn't crash, it's still alive. Keep it.
-                    active_listeners.append(callback)
-                except RuntimeError as e:
-                    # Check for standard PyQt "object deleted" error
-                    if "wrapped C/C++ object" in str(e) or "has been deleted" in str(e):
-                        # It's a zombie widget. Let it die (don't add to active_listeners).
-                        pass
-                    else:
-                        # Some other real logic error, print it
-                        print(f"State Update Error ({key}): {e}")
-                except Exception as e:
+        Listeners whose widget was destroyed are already gone (see subscribe).
+        """
+        if key in self._computed:
+            print(f"⚠️ State SET ignored: '{key}' is a computed key")
+            return
+
+        nested = "." in key
+        segments = state_paths.split(key) if nested else [key]
+        registry = self._nested.get(segments[0])
+
+        batch = self._batch
+        old = MISSING
+        if registry or (batch is not None and key not in batch):
+            old = state_paths.resolve(self._data, segments)
+
+        if nested:
+            state_paths.assign(self._data, segments, value)
+        else:
+            self._data[key] = value
+
+        if batch is not None:
+            # The value before the first write is what listeners compare against
+            if key not in batch:
+                batch[key] = (segments, old)
+            # Computed keys go dirty now (get() reads through); listeners wait for _flush
+            if self._dependents:
+                self._invalidate(segments)
+            return
+        self._notify(key, segments, old, value)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Batches set() calls:
+
+            with store.transaction():
+                store.set("a", 1)
+                store.set("b.c", 2)
+
+        get() sees new values (computed keys included) immediately; listeners
+        run when the outermost transaction exits, once per key set, ancestor
+        and computed key.
+        """
+        if self._batch is not None:
+            yield self  # Nested: the outer transaction flushes
+            return
+        self._batch, self._stale = {}, {}
+        try:
+            yield self
+        finally:
+            batch, self._batch = self._batch, None
+            stale, self._stale = self._stale, None
+            self._flush(batch, stale)
+
+    def _flush(self, batch, stale):
+        keys = set(batch)
+        ancestors = {}
+        for key, (segments, old) in batch.items():
+            value = state_paths.resolve(self._data, segments)
+            self._notify(key, segments, old, None if value is MISSING else value, ancestors=ancestors)
+            for i in range(len(segments) - 1, 0, -1):
+                ancestor = state_paths.join(segments[:i])
+                if ancestor not in keys:
+                    ancestors[ancestor] = None
+
+        # Containers changed in place: notified once, after every key inside them
+        for ancestor in ancestors:
+            subs = self._listeners.get(ancestor)
+            if subs:
+                self._dispatch(ancestor, subs, (self.get(ancestor),))
+
+        self._notify_computed(stale.items())
+
+    def _notify(self, key, segments, old, value, ancestors=None):
+        """
+        Listeners of a key that was just set. With 'ancestors' (a transaction
+        flush) ancestor and computed-key notifications are left to the caller.
+        """
+        nested = len(segments) > 1
+        registry = self._nested.get(segments[0])
+
+        subs = self._listeners.get(key)
+        if monitor.enabled:
+            monitor.record_notify(key, len(subs) if subs else 0)
+
+        if subs:
+            self._dispatch(key, subs, (value,))
+
+        if nested and ancestors is None:
+            # Ancestors: their container was modified in place
+            for i in range(len(segments) - 1, 0, -1):
+                ancestor = state_paths.join(segments[:i])
+                anc_subs = self._listeners.get(ancestor)
+                if anc_subs:
+                    self._dispatch(ancestor, anc_subs, (self.get(ancestor),))
+
+        if registry:
+            self._notify_related(segments, old, value, registry)
+
+        if self._dependents and ancestors is None:
+            self._invalidate(segments)
+
+    def _notify_related(self, segments, old, new, registry):
+        """Notifies dotted and wildcard subscriptions below / around 'segments'."""
+        depth = len(segments)
+        path = state_paths.join(segments)
+
+        for pattern, psegs in list(registry.items()):
+            plain = self._listeners.get(pattern)
+            if plain and depth < len(psegs) and psegs[:depth] == segments:
+                # Exact descendant: only if its slice was replaced
+                rest = psegs[depth:]
+                before = state_paths.resolve(old, rest)
+                after = state_paths.resolve(new, rest)
+                if before is not after:
+                    self._dispatch(pattern, plain, (None if after is MISSING else after,))
+
+            wild = self._path_listeners.get(pattern)
+            if not wild:
+                continue
+
+            deep = psegs[-1] == "**"
+            base = psegs[:-1] if deep else psegs
+            width = len(base)
+
+            if depth >= width and state_paths.match(base, segments[:width]):
+                if depth == width or deep:
+                    self._dispatch(pattern, wild, (path, new))
+                else:
+                    # Something inside a watched slice changed
+                    slice_path = state_paths.join(segments[:width])
+                    self._dispatch(pattern, wild, (slice_path, self.get(slice_path)))
+
+            elif depth < width and state_paths.match(base[:depth], segments):
+                # A container above the watched slices was replaced
+                for rest in state_paths.expand(base[depth:], old, new):
+                    before = state_paths.resolve(old, rest)
+                    after = state_paths.resolve(new, rest)
+                    if before is not after:
+                        concrete = state_paths.join(segments + rest)
+                        self._dispatch(pattern, wild, (concrete, None if after is MISSING else after))
+
+    def _dispatch(self, key, subs, args):
+        profiler = self._profiler
+        if profiler:
+            entry = profiler.record_set(key, len(subs))
+
+        # Snapshot: listeners may (un)subscribe while being notified
+        for sub in list(subs):
+            if sub.store is None:
+                continue
+            callback = sub.callback
+            if callback is None:
+                # Weakly held method whose object was collected
+                self.unsubscribe(sub)
+                continue
+            try:
+                if profiler:
+                    profiler.call(entry, key, callback, args)
+                else:
+                    callback(*args)
+            except RuntimeError as e:
+                # Owner-less listener on a deleted Qt object: drop it
+                if "wrapped C/C++ object" in str(e) or "has been deleted" in str(e):
+                    self.unsubscribe(sub)
+                else:
                     print(f"State Update Error ({key}): {e}")
+            except Exception as e:
+                print(f"State Update Error ({key}): {e}")
 
-            # Replace the old list with the cleaned list
-            self._listeners[key] = active_listeners
+    # --- Computed keys ---
 
-    def subscribe(self, key, callback):
-        if key not in self._listeners:
-            self._listeners[key] = []
-        self._listeners[key].append(callback)
-        
-        if key in self._data:
+    def define_computed(self, key, fn):
+        """
+        Declares key as computed by fn(get). Reads made through 'get' are
+        tracked as dependencies; the value is cached until one of them changes.
+        """
+        old = self._computed.pop(key, None)
+        if old:
+            self._set_dependencies(key, old, [])
+        if key in self._data and not old:
+            # Kept underneath: get() reads the computed key, remove_computed() uncovers it
+            print(f"⚠️ State: computed key '{key}' hides its plain value")
+
+        comp = self._computed[key] = _Computed(fn)
+        subs = self._listeners.get(key)
+        if subs:
+            self._dispatch(key, subs, (self._evaluate(key, comp),))
+
+        # Computed keys that read the previous definition are stale now
+        if old and self._dependents:
+            self._invalidate([key])
+
+    def remove_computed(self, key):
+        comp = self._computed.pop(key, None)
+        if comp:
+            self._set_dependencies(key, comp, [])
+
+    def is_computed(self, key):
+        return key in self._computed
+
+    def _evaluate(self, key, comp):
+        if not comp.dirty or comp.busy:
+            return comp.value
+
+        deps = []
+        def tracking_get(dep, default=None):
+            deps.append(dep)
+            return self.get(dep, default)
+
+        comp.busy = True
+        try:
+            comp.value = comp.fn(tracking_get)
+        except Exception as e:
+            print(f"Computed Error ({key}): {e}")
+            comp.value = None
+        finally:
+            comp.busy = False
+
+        comp.dirty = False
+        self._set_dependencies(key, comp, deps)
+        return comp.value
+
+    def _set_dependencies(self, key, comp, deps):
+        for dep in comp.deps:
+            root = dep.split(".", 1)[0]
+            entry = self._dependents.get(root)
+            if entry and dep in entry:
+                entry[dep].discard(key)
+                if not entry[dep]:
+                    del entry[dep]
+                if not entry:
+                    del self._dependents[root]
+
+        comp.deps = list(dict.fromkeys(deps))
+        for dep in comp.deps:
+            root = dep.split(".", 1)[0]
+            self._dependents.setdefault(root, {}).setdefault(dep, set()).add(key)
+
+    def _invalidate(self, *changed):
+        """Marks computed keys depending on (a slice related to) the changed segments dirty."""
+        pending = []
+        for segments in changed:
+            entry = self._dependents.get(segments[0])
+            if not entry:
+                continue
+            for dep, keys in entry.items():
+                dep_segments = dep.split(".")
+                n = min(len(dep_segments), len(segments))
+                if dep_segments[:n] == segments[:n]:
+                    pending.extend(keys)
+
+        # Dirty keys are propagated to computed keys that read them, breadth first
+        invalidated = []
+        while pending:
+            key = pending.pop(0)
+            comp = self._computed.get(key)
+            if comp is None or comp.dirty:
+                continue
+            comp.dirty = True
+            invalidated.append((key, comp.value))
+            pending.extend(self._dependents.get(key, {}).get(key, ()))
+
+        if self._stale is not None:
+            # Inside transaction(): notified once, when it ends
+            for key, previous in invalidated:
+                self._stale.setdefault(key, previous)
+            return
+        self._notify_computed(invalidated)
+
+    def _notify_computed(self, invalidated):
+        """Listeners of invalidated computed keys, given as (key, value before)."""
+        # Only keys somebody listens to are recomputed now; the rest stay lazy
+        for key, previous in invalidated:
+            subs = self._listeners.get(key)
+            comp = self._computed.get(key)
+            if not subs or comp is None:
+                continue
+            value = self._evaluate(key, comp)
+            if isinstance(value, _IMMUTABLE) and value == previous:
+                continue
+            if monitor.enabled:
+                monitor.record_notify(key, len(subs))
+            self._dispatch(key, subs, (value,))
+
+    # --- Subscriptions ---
+
+    def subscribe(self, key, callback, owner=None):
+        """
+        Registers callback(value) for key and returns a Subscription handle.
+        'owner' (a QObject) scopes the subscription: it is removed when the owner
+        emits 'destroyed'. Bound methods of QObjects use their object as owner.
+        """
+        sub = self._add_subscription(self._listeners, key, callback, owner, with_path=False)
+
+        value = self.get(key, MISSING)
+        if value is not MISSING:
             try:
-                callback(self._data[key])
+                callback(value)
             except RuntimeError:
                 pass
+        return sub
+
+    def subscribe_path(self, pattern, callback, owner=None):
+        """
+        Registers callback(path, value) for a path pattern:
+            'canvas_data.*'    -> each line, called with the line that changed
+            'canvas.lines.**'  -> anything at or below canvas.lines
+        Called once per existing match on subscribe.
+        """
+        sub = self._add_subscription(self._path_listeners, pattern, callback, owner, with_path=True)
+
+        psegs = state_paths.split(pattern)
+        base = psegs[:-1] if psegs[-1] == "**" else psegs
+        for concrete in state_paths.expand(base, self._data):
+            value = state_paths.resolve(self._data, concrete)
+            if value is MISSING:
+                continue
+            try:
+                callback(state_paths.join(concrete), value)
+            except RuntimeError:
+                pass
+        return sub
+
+    def select(self, inputs, fn, callback, owner=None):
+        """
+        Memoized selector: callback(fn(*input_values)) whenever an input path
+        changes and the result differs. Returns the Selector (has .value, .unsubscribe()).
+        """
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        return Selector(self, inputs, fn, callback, owner)
+
+    def _add_subscription(self, registry, key, callback, owner, with_path):
+        if owner is None:
+            bound_to = getattr(callback, "__self__", None)
+            if bound_to is not None and _is_qobject(bound_to):
+                owner = bound_to
+
+        owner_id = None
+        if owner is not None and _is_qobject(owner):
+            owner_id = id(owner)
+            if owner_id not in self._owners:
+                self._owners[owner_id] = []
+                owner.destroyed.connect(partial(self._on_owner_destroyed, owner_id))
+
+        sub = Subscription(self, key, callback, owner_id, with_path)
+        registry.setdefault(key, {})[sub] = None
+        if owner_id is not None:
+            self._owners[owner_id].append(sub)
+
+        if with_path or ("." in key and key not in self._computed):
+            segments = state_paths.split(key)
+            self._nested.setdefault(segments[0], {})[key] = segments
+        return sub
+
+    def unsubscribe(self, sub):
+        if sub.store is not self:
+            return
+        sub.store = None
+        registry = self._path_listeners if sub.with_path else self._listeners
+        subs = registry.get(sub.key)
+        if subs is not None:
+            subs.pop(sub, None)
+            if not subs:
+                del registry[sub.key]
+                self._forget_pattern(sub.key)
+
+    def _forget_pattern(self, key):
+        if key in self._listeners or key in self._path_listeners:
+            return
+        root = key.split(".", 1)[0]
+        patterns = self._nested.get(root)
+        if patterns and key in patterns:
+            del patterns[key]
+            if not patterns:
+                del self._nested[root]
+
+    def _on_owner_destroyed(self, owner_id, *_):
+        for sub in self._owners.pop(owner_id, ()):
+            self.unsubscribe(sub)
 
     def clear_listeners(self):
         """
-        Called when switching workspaces to dump all old connections.
+        Drops every subscription. Workspace switches no longer need this,
+        since widget subscriptions die with their owners.
         """
+        for registry in (self._listeners, self._path_listeners):
+            for subs in registry.values():
+                for sub in subs:
+                    sub.store = None
         self._listeners = {}
+        self._path_listeners = {}
+        self._nested = {}
+        self._owners = {}
+
+    # --- Profiling ---
+
+    def enable_profiling(self, budget_ms=4.0):
+        """
+        Starts recording per key / per listener timings.
+        Listeners slower than budget_ms print a warning.
+        """
+        if self._profiler:
+            self._profiler.budget_ms = float(budget_ms)
+        else:
+            self._profiler = ListenerProfiler(budget_ms)
+
+    def disable_profiling(self):
+        self._profiler = None
+
+    def profile_snapshot(self):
+        return self._profiler.snapshot() if self._profiler else {}
+
+    def dump_profile(self, path):
+        """Writes the recorded timings to path. Returns False (nothing written) if profiling is off."""
+        if not self._profiler:
+            return False
+        self._profiler.dump(path)
+        return True
@@ -0,0 +1,112 @@
+"""
+Helpers for dotted state paths, e.g. 'canvas_data.3' or 'canvas.lines.*.strokes'.
+
+Segments address dict keys or list indices. Numeric segments also match
+integer dict keys, so 'canvas_data.3' reaches canvas_data[3].
+A '*' segment matches exactly one level; a trailing '**' matches everything below.
+"""
+
+MISSING = object()
+
+
+def split(path):
+    return path.split(".")
+
+
+def join(segments):
+    return ".".join(str(s) for s in segments)
+
+
+def _child(container, seg):
+    if isinstance(container, dict):
+        if seg in container:
+            return container[seg]
+        if seg.lstrip("-").isdigit():
+            return container.get(int(seg), MISSING)
+        return MISSING
+    if isinstance(container, (list, tuple)):
+        try:
+            return container[int(seg)]
+        except (ValueError, IndexError):
+            return MISSING
+    return MISSING
+
+
+def resolve(container, segments):
+    for seg in segments:
+        if container is MISSING:
+            return MISSING
+        container = _child(container, seg)
+    return container
+
+
+def assign(root, segments, value):
+    """
+    Writes value at segments inside root (a dict), creating dicts on the way.
+    Numeric segments become int keys unless a matching str key already exists.
+    """
+    container = root
+    for i, seg in enumerate(segments):
+        last = i == len(segments) - 1
+
+        if isinstance(container, list):
+            index = int(seg)
+            if last:
+                if index == len(container):
+                    container.append(value)
+                else:
+                    container[index] = value
+                return
+            container = container[index]
+            continue
+
+        if not isinstance(container, dict):
+            raise TypeError(f"Cannot set '{seg}' inside {type(container).__name__}")
+
+        key = seg
+        if seg not in container and seg.lstrip("-").isdigit():
+            key = int(seg)
+
+        if last:
+            container[key] = value
+            return
+        if key not in container or not isinstance(container[key], (dict, list)):
+            container[key] = {}
+        container = container[key]
+
+
+def child_keys(container):
+    if isinstance(container, dict):
+        return [str(k) for k in container]
+    if isinstance(container, (list, tuple)):
+        return [str(i) for i in range(len(container))]
+    return []
+
+
+def match(pattern, segments):
+    """True if the pattern segments match the concrete segments one to one."""
+    if len(pattern) != len(segments):
+        return False
+    return all(p == "*" or p == s for p, s in zip(pattern, segments))
+
+
+def expand(pattern, *containers):
+    """
+    Concrete segment lists matching pattern inside any of the containers.
+    Used to find the slices a wildcard subscription covers.
+    """
+    results = [[]]
+    for seg in pattern:
+        next_results = []
+        for prefix in results:
+            if seg == "*":
+                keys = []
+                for c in containers:
+                    for k in child_keys(resolve(c, prefix)):
+                        if k not in keys:
+                            keys.append(k)
+                next_results.extend(prefix + [k] for k in keys)
+            else:
+                next_results.append(prefix + [seg])
+        results = next_results
+    return results
@@ -0,0 +1,88 @@
+import json
+import time
+from functools import partial
+
+
+def callback_name(callback):
+    """
+    Readable identifier for a listener.
+    Bound methods -> 'Class.method', partials -> wrapped name, closures -> qualname.
+    """
+    while isinstance(callback, partial):
+        callback = callback.func
+
+    owner = getattr(callback, "__self__", None)
+    func = getattr(callback, "__func__", None)
+    if owner is not None and func is not None:
+        return f"{type(owner).__name__}.{func.__name__}"
+
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+class ListenerProfiler:
+    """
+    Per key / per callback timing for StateStore notifications.
+    Only used while profiling is enabled; StateStore calls listeners directly otherwise.
+    """
+    def __init__(self, budget_ms=4.0):
+        self.budget_ms = float(budget_ms)
+        self.keys = {}  # { key: {"sets", "fanout", "max_fanout", "total_ms", "listeners": {name: stats}} }
+
+    def record_set(self, key, fanout):
+        entry = self.keys.get(key)
+        if entry is None:
+            entry = self.keys[key] = {
+                "sets": 0, "fanout": 0, "max_fanout": 0, "total_ms": 0.0, "listeners": {}
+            }
+        entry["sets"] += 1
+        entry["fanout"] = fanout
+        if fanout > entry["max_fanout"]:
+            entry["max_fanout"] = fanout
+        return entry
+
+    def call(self, entry, key, callback, args):
+        """Runs one listener and records its timing. Exceptions propagate to the store."""
+        start = time.perf_counter()
+        try:
+            callback(*args)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            name = callback_name(callback)
+
+            stats = entry["listeners"].get(name)
+            if stats is None:
+                stats = entry["listeners"][name] = {"calls": 0, "total_ms": 0.0, "max_ms": 0.0}
+            stats["calls"] += 1
+            stats["total_ms"] += elapsed_ms
+            if elapsed_ms > stats["max_ms"]:
+                stats["max_ms"] = elapsed_ms
+            entry["total_ms"] += elapsed_ms
+
+            if elapsed_ms > self.budget_ms:
+                print(f"⚠️ Slow listener on '{key}': {name} took {elapsed_ms:.2f} ms "
+                      f"(budget {self.budget_ms:.2f} ms)")
+
+    def snapshot(self):
+        """Deep copy of the collected stats, safe to serialise or mutate."""
+        snap = {}
+        for key, entry in self.keys.items():
+            snap[key] = {
+                "sets": entry["sets"],
+                "fanout": entry["fanout"],
+                "max_fanout": entry["max_fanout"],
+                "total_ms": round(entry["total_ms"], 4),
+                "listeners": {
+                    name: {
+                        "calls": s["calls"],
+                        "total_ms": round(s["total_ms"], 4),
+                        "max_ms": round(s["max_ms"], 4),
+                        "avg_ms": round(s["total_ms"] / s["calls"], 4) if s["calls"] else 0.0,
+                    }
+                    for name, s in entry["listeners"].items()
+                },
+            }
+        return snap
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump({"budget_ms": self.budget_ms, "keys": self.snapshot()}, f, indent=2)
@@ -0,0 +1,86 @@
+from PyQt6.QtGui import QColor
+from PyQt6.QtCore import Qt, QObject, QTimer, QElapsedTimer
+
+
+class AutoPan(QObject):
+    """
+    Follow-the-pen: while drawing, the pen nearing the right edge first shows
+    a yellow indicator (within warn_px), then a red one (within edge_px) and
+    eases the canvas left by 'distance' (a fraction of the width) over
+    duration_ms. The pan is paced by elapsed time, not by tick count, so a
+    dropped frame does not slow it down. It re-arms once the pen leaves the
+    red zone.
+    """
+    COLORS = {"warn": QColor(255, 193, 7, 150), "edge": QColor(229, 57, 53, 170)}
+    BAR_PX = 6
+
+    def __init__(self, canvas):
+        super().__init__(canvas)
+        self.canvas = canvas
+        self.enabled = True
+        self.warn_px = 120
+        self.edge_px = 48
+        self.distance = 0.5
+        self.duration_ms = 250
+
+        self.zone = None     # None, "warn" or "edge"
+        self._armed = True
+        self._travel = 0     # px this pan moves in total
+        self._done = 0       # px moved so far
+
+        self._clock = QElapsedTimer()
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(16)
+        self.timer.timeout.connect(self._tick)
+
+    @property
+    def running(self):
+        return self.timer.isActive()
+
+    def track(self, x):
+        """The pen is at widget x while drawing."""
+        if not self.enabled:
+            return
+        right = self.canvas.width() - x
+        zone = "edge" if right <= self.edge_px else "warn" if right <= self.warn_px else None
+        if zone != self.zone:
+            self.zone = zone
+            self.canvas.request_paint()
+        if zone != "edge":
+            self._armed = True
+        elif self._armed and not self.running:
+            self._start()
+
+    def release(self):
+        """The pen was lifted; a pan in progress still finishes."""
+        if self.zone is not None:
+            self.zone = None
+            self.canvas.request_paint()
+        self._armed = True
+
+    def _start(self):
+        self._armed = False
+        self._travel = round(self.canvas.width() * self.distance)
+        self._done = 0
+        self._clock.start()
+        self.timer.start()
+
+    def _tick(self):
+        t = min(1.0, self._clock.elapsed() / max(self.duration_ms, 1))
+        eased = 1 - (1 - t) ** 3  # Ease out
+        step = round(self._travel * eased) - self._done
+        if step:
+            self._done += step
+            self.canvas.pan_by(-step)
+        if t >= 1.0:
+            self.timer.stop()
+            self.canvas.publish_offset()
+
+    def draw(self, painter):
+        """Edge indicator, in widget coordinates."""
+        color = self.COLORS.get(self.zone)
+        if color is None:
+            return
+        w = self.canvas.width()
+        painter.fillRect(w - self.BAR_PX, 0, self.BAR_PX, self.canvas.height(), color)
@@ -0,0 +1,148 @@
+"""
+Local command endpoint: other processes drive the ActionDispatcher through a
+QLocalServer (a Unix domain socket, or a named pipe on Windows).
+
+Clients write newline-delimited commands in the usual syntax and read back
+one JSON line per command, in order:
+
+    state set --key=status --value=busy   ->  {"ok": true, "result": null}
+    state get --key=canvas_zoom           ->  {"ok": true, "result": 1.0}
+    frobnicate                            ->  {"ok": false, "error": "Unknown Command: ..."}
+
+Commands can be pipelined (sent without waiting for replies). Everything that
+has arrived when the event loop gets to it runs as one batch inside a single
+state transaction, so a burst of 'state set' lines notifies each key once.
+"""
+import json
+from functools import partial
+
+from PyQt6.QtCore import QObject, QTimer
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+
+from app.core.command_parser import parse_command
+
+DEFAULT_NAME = "johndraw"
+MAX_LINE = 1 << 20  # Bytes; a client sending longer lines is disconnected
+
+
+def _jsonable(value):
+    """json.dumps fallback for values the state holds (points, strokes, sets, widgets)."""
+    if hasattr(value, "x") and hasattr(value, "y") and callable(value.x):
+        return [value.x(), value.y()]
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    try:
+        return list(value)
+    except TypeError:
+        return repr(value)
+
+
+def _in_use(name, timeout_ms=200):
+    """True if a server answers on 'name' (as opposed to a stale socket file)."""
+    probe = QLocalSocket()
+    probe.connectToServer(name)
+    if not probe.waitForConnected(timeout_ms):
+        return False
+    probe.disconnectFromServer()
+    return True
+
+
+def reply(ok, value):
+    body = {"ok": True, "result": value} if ok else {"ok": False, "error": value}
+    return (json.dumps(body, default=_jsonable) + "\n").encode("utf-8")
+
+
+class CommandServer(QObject):
+    def __init__(self, dispatcher, parent=None):
+        super().__init__(parent)
+        self.dispatcher = dispatcher
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self._accept)
+
+        self._buffers = {}   # { socket: bytes } received after the last newline
+        self._pending = []   # [(socket, line)] waiting for the next batch
+        self._scheduled = False
+
+    @property
+    def name(self):
+        return self.server.fullServerName()
+
+    def listen(self, name=DEFAULT_NAME):
+        if not self.server.listen(name):
+            if _in_use(name):
+                print(f"❌ Command server: '{name}' is served by another running instance")
+                return False
+            # A socket file left behind by a crashed instance blocks listen()
+            QLocalServer.removeServer(name)
+        if not self.server.isListening() and not self.server.listen(name):
+            print(f"❌ Command server: cannot listen on '{name}': {self.server.errorString()}")
+            return False
+        print(f"   -> Command server listening on {self.name}")
+        return True
+
+    def close(self):
+        for sock in list(self._buffers):
+            sock.disconnectFromServer()
+        self.server.close()
+
+    # --- Connections ---
+
+    def _accept(self):
+        while self.server.hasPendingConnections():
+            sock = self.server.nextPendingConnection()
+            self._buffers[sock] = b""
+            sock.readyRead.connect(partial(self._read, sock))
+            sock.disconnected.connect(partial(self._drop, sock))
+
+    def _read(self, sock):
+        if sock not in self._buffers:
+            return
+        *lines, rest = (self._buffers[sock] + bytes(sock.readAll())).split(b"\n")
+        if len(rest) > MAX_LINE:
+            sock.write(reply(False, f"line longer than {MAX_LINE} bytes"))
+            sock.disconnectFromServer()
+            return
+        self._buffers[sock] = rest
+        if not lines:
+            return
+        self._pending.extend((sock, line) for line in lines)
+        if not self._scheduled:
+            # Whatever else arrives before the next loop iteration joins this batch
+            self._scheduled = True
+            QTimer.singleShot(0, self._run)
+
+    def _drop(self, sock):
+        if self._buffers.pop(sock, None) is None:
+            return
+        self._pending = [(s, line) for s, line in self._pending if s is not sock]
+        sock.deleteLater()
+
+    # --- Execution ---
+
+    def _run(self):
+        self._scheduled = False
+        batch, self._pending = self._pending, []
+        out = {}
+        with self.dispatcher.state_store.transaction():
+            for sock, line in batch:
+                out.setdefault(sock, []).append(self._execute(line))
+        # Replies after the transaction: listeners have seen the whole batch
+        for sock, replies in out.items():
+            if sock in self._buffers and sock.state() == QLocalSocket.LocalSocketState.ConnectedState:
+                sock.write(b"".join(replies))
+
+    def _execute(self, line):
+        text = line.decode("utf-8", "replace").strip()
+        if not text or text.startswith("#"):
+            return reply(True, None)
+        cmd_obj = parse_command(text)
+        if cmd_obj is None:
+            return reply(False, f"could not parse '{text}'")
+        try:
+            result = self.dispatcher.execute(cmd_obj)
+        except Exception as e:
+            return reply(False, str(e))
+        try:
+            return reply(True, result)
+        except (TypeError, ValueError) as e:
+            return reply(False, f"result is not serializable: {e}")
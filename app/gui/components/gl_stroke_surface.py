@@ -0,0 +1,280 @@
+import os
+from array import array
+
+from PyQt6.QtGui import QPainter, QColor, QOpenGLContext, QOffscreenSurface
+from PyQt6.QtCore import Qt
+from PyQt6.QtOpenGLWidgets import QOpenGLWidget
+from PyQt6.QtOpenGL import (
+    QOpenGLBuffer, QOpenGLShader, QOpenGLShaderProgram,
+    QOpenGLVersionFunctionsFactory, QOpenGLVersionProfile
+)
+
+from app.core.perf_monitor import timed_paint
+from app.gui.components.stroke import triangle_vertices
+
+# GL enums (PyQt6 does not export them)
+GL_TRIANGLES = 0x0004
+GL_TRIANGLE_STRIP = 0x0005
+GL_FLOAT = 0x1406
+GL_COLOR_BUFFER_BIT = 0x4000
+GL_BLEND = 0x0BE2
+GL_SRC_ALPHA = 0x0302
+GL_ONE_MINUS_SRC_ALPHA = 0x0303
+
+# GLSL 1.10 / ES 2.0 so it runs on Mesa llvmpipe and old drivers alike
+_PRECISION = """
+#ifdef GL_ES
+precision mediump float;
+#endif
+"""
+
+_STROKE_VS = """
+attribute vec2 a_pos;
+uniform vec2 u_offset;
+uniform float u_scale;
+uniform vec2 u_viewport;
+void main() {
+    vec2 p = (a_pos * u_scale + u_offset) / u_viewport * 2.0 - 1.0;
+    gl_Position = vec4(p.x, -p.y, 0.0, 1.0);
+}
+"""
+
+_STROKE_FS = _PRECISION + """
+uniform vec4 u_color;
+void main() { gl_FragColor = u_color; }
+"""
+
+_GRID_VS = """
+attribute vec2 a_pos;
+void main() { gl_Position = vec4(a_pos, 0.0, 1.0); }
+"""
+
+# Grid lines every u_spacing px and the red baseline at world y = 0
+_GRID_FS = _PRECISION + """
+uniform vec2 u_offset;
+uniform float u_height;
+uniform float u_spacing;
+uniform vec4 u_grid;
+void main() {
+    vec2 px = vec2(gl_FragCoord.x, u_height - gl_FragCoord.y) - u_offset;
+    vec2 cell = mod(floor(px), u_spacing);
+    if (abs(px.y) < 1.0) {
+        gl_FragColor = vec4(1.0, 0.0, 0.0, 1.0);
+    } else if (cell.x < 1.0 || cell.y < 1.0) {
+        gl_FragColor = u_grid;
+    } else {
+        gl_FragColor = vec4(1.0);
+    }
+}
+"""
+
+_probe_result = None
+
+
+def use_software_gl():
+    """
+    Routes GL through Mesa llvmpipe. Must run before the first GL context is
+    created; used on machines without a GPU (CI, kiosks).
+    """
+    os.environ.setdefault("LIBGL_ALWAYS_SOFTWARE", "1")
+    os.environ.setdefault("GALLIUM_DRIVER", "llvmpipe")
+
+
+def gl_available():
+    """Probes once whether the platform can create an OpenGL context."""
+    global _probe_result
+    if _probe_result is None:
+        ctx = QOpenGLContext()
+        _probe_result = False
+        if ctx.create():
+            surface = QOffscreenSurface()
+            surface.create()
+            _probe_result = ctx.makeCurrent(surface)
+            if _probe_result:
+                ctx.doneCurrent()
+    return _probe_result
+
+
+class GLStrokeSurface(QOpenGLWidget):
+    """
+    GPU render surface for VectorCanvas.
+
+    Committed strokes of the active line live in a vertex buffer in world
+    coordinates; strokes appended since the last frame are uploaded with
+    glBufferSubData; panning and zooming only change the u_offset and
+    u_scale uniforms.
+    Input still goes to the canvas underneath (mouse-transparent).
+    """
+    def __init__(self, canvas):
+        super().__init__(canvas)
+        self.canvas = canvas
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents, True)
+
+        self.gl = None
+        self.failed = False
+        self.stroke_program = None
+        self.grid_program = None
+        self.stroke_vbo = None
+        self.quad_vbo = None
+
+        # CPU mirror of what is on the GPU
+        self._vertices = array('f')
+        self._uploaded_floats = 0
+        self._capacity_bytes = 0
+        self._source = None        # The stroke list the buffer was built from
+        self._source_count = 0     # How many of its strokes are in the buffer
+        self._source_revision = 0  # Canvas line revision the buffer was built at
+
+    # --- Geometry sync ---
+
+    def sync_strokes(self, strokes, revision=0):
+        """
+        Mirrors the given stroke list. Appends are incremental; any other
+        change (line switch, or an erase, which bumps the revision) rebuilds
+        the buffer.
+        """
+        if (strokes is not self._source or len(strokes) < self._source_count
+                or revision != self._source_revision):
+            self._vertices = array('f')
+            self._uploaded_floats = 0
+            self._source = strokes
+            self._source_count = 0
+            self._source_revision = revision
+
+        for stroke in strokes[self._source_count:]:
+            widths = getattr(stroke, "widths", None) or [self.canvas.pen_width] * len(stroke)
+            triangle_vertices(stroke, widths, self._vertices)
+        self._source_count = len(strokes)
+
+    def _upload(self):
+        total = len(self._vertices)
+        if total == self._uploaded_floats:
+            return
+        item = self._vertices.itemsize
+        self.stroke_vbo.bind()
+        if total * item > self._capacity_bytes or self._uploaded_floats > total:
+            # Grow geometrically so appends stay amortised O(new vertices)
+            self._capacity_bytes = max(total * item * 2, 64 * 1024)
+            self.stroke_vbo.allocate(self._capacity_bytes)
+            self.stroke_vbo.write(0, self._vertices.tobytes(), total * item)
+        else:
+            start = self._uploaded_floats
+            self.stroke_vbo.write(start * item, self._vertices[start:].tobytes(), (total - start) * item)
+        self.stroke_vbo.release()
+        self._uploaded_floats = total
+
+    # --- QOpenGLWidget ---
+
+    def initializeGL(self):
+        profile = QOpenGLVersionProfile()
+        profile.setVersion(2, 0)
+        ctx = self.context()
+        self.gl = QOpenGLVersionFunctionsFactory.get(profile, ctx) if ctx else None
+        if self.gl is None or not self.gl.initializeOpenGLFunctions():
+            print("❌ GL Error: OpenGL 2.0 functions unavailable")
+            self.failed = True
+            return
+
+        self.stroke_program = self._build_program(_STROKE_VS, _STROKE_FS)
+        self.grid_program = self._build_program(_GRID_VS, _GRID_FS)
+        if not (self.stroke_program and self.grid_program):
+            self.failed = True
+            return
+
+        self.stroke_vbo = QOpenGLBuffer(QOpenGLBuffer.Type.VertexBuffer)
+        self.stroke_vbo.setUsagePattern(QOpenGLBuffer.UsagePattern.DynamicDraw)
+        self.stroke_vbo.create()
+        self._capacity_bytes = 0
+        self._uploaded_floats = 0
+
+        quad = array('f', [-1.0, -1.0, 1.0, -1.0, -1.0, 1.0, 1.0, 1.0])
+        self.quad_vbo = QOpenGLBuffer(QOpenGLBuffer.Type.VertexBuffer)
+        self.quad_vbo.create()
+        self.quad_vbo.bind()
+        self.quad_vbo.allocate(quad.tobytes(), len(quad) * quad.itemsize)
+        self.quad_vbo.release()
+
+    def _build_program(self, vs, fs):
+        program = QOpenGLShaderProgram(self)
+        ok = (program.addShaderFromSourceCode(QOpenGLShader.ShaderTypeBit.Vertex, vs)
+              and program.addShaderFromSourceCode(QOpenGLShader.ShaderTypeBit.Fragment, fs))
+        program.bindAttributeLocation("a_pos", 0)
+        if not ok or not program.link():
+            print(f"❌ GL Shader Error: {program.log()}")
+            return None
+        return program
+
+    @timed_paint
+    def paintGL(self):
+        self.canvas._begin_frame()
+        if self.failed:
+            return
+
+        painter = QPainter(self)
+        painter.beginNativePainting()
+        self._paint_grid()
+        painter.endNativePainting()
+
+        # Onion skin layers are cached images: blitted between grid and ink
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.canvas.world_transform(painter)
+        self.canvas._draw_onion_skin(painter)
+
+        painter.beginNativePainting()
+        self._paint_strokes()
+        painter.endNativePainting()
+
+        # The live stroke changes every frame: drawn with QPainter on top
+        self.canvas._draw_overlays(painter)
+        self.canvas._draw_screen_overlays(painter)
+        painter.end()
+
+        self.canvas._end_frame()
+
+    def _paint_grid(self):
+        gl = self.gl
+        dpr = self.devicePixelRatioF()
+        h = self.height() * dpr
+        ox, oy = self.canvas.offset.x() * dpr, self.canvas.offset.y() * dpr
+
+        gl.glClearColor(1.0, 1.0, 1.0, 1.0)
+        gl.glClear(GL_COLOR_BUFFER_BIT)
+
+        # Grid + baseline: one fullscreen quad
+        grid = self.grid_program
+        grid.bind()
+        grid.setUniformValue("u_offset", float(ox), float(oy))
+        grid.setUniformValue("u_height", float(h))
+        grid.setUniformValue("u_spacing", float(self.canvas._grid_step() * dpr))
+        grid.setUniformValue("u_grid", QColor(self.canvas.grid_color))
+        self.quad_vbo.bind()
+        grid.enableAttributeArray(0)
+        grid.setAttributeBuffer(0, GL_FLOAT, 0, 2, 0)
+        gl.glDrawArrays(GL_TRIANGLE_STRIP, 0, 4)
+        grid.disableAttributeArray(0)
+        self.quad_vbo.release()
+        grid.release()
+
+    def _paint_strokes(self):
+        # Committed strokes: one draw call, pan is a uniform
+        gl = self.gl
+        index = self.canvas.active_index
+        self.sync_strokes(self.canvas.data_slots.get(index, []), self.canvas.line_revisions.get(index, 0))
+        self._upload()
+        count = self._uploaded_floats // 2
+        if count:
+            gl.glEnable(GL_BLEND)
+            gl.glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+            prog = self.stroke_program
+            prog.bind()
+            prog.setUniformValue("u_offset", float(self.canvas.offset.x()), float(self.canvas.offset.y()))
+            prog.setUniformValue("u_scale", float(self.canvas.zoom))
+            prog.setUniformValue("u_viewport", float(self.width()), float(self.height()))
+            prog.setUniformValue("u_color", QColor(Qt.GlobalColor.black))
+            self.stroke_vbo.bind()
+            prog.enableAttributeArray(0)
+            prog.setAttributeBuffer(0, GL_FLOAT, 0, 2, 0)
+            gl.glDrawArrays(GL_TRIANGLES, 0, count)
+            prog.disableAttributeArray(0)
+            self.stroke_vbo.release()
+            prog.release()
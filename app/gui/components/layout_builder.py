@@ -4,11 +4,13 @@ import sys
 import re  # <--- NEW IMPORT
 import importlib
 import importlib.util
+import weakref
 from functools import partial
-from PyQt6.QtWidgets import QWidget, QLayout, QLabel
+from PyQt6.QtWidgets import QWidget, QLayout, QBoxLayout, QLabel
 from PyQt6.QtCore import Qt
 
 from app.core.command_parser import parse_command
+from app.core import computed
 
 try:
     import tomllib
@@ -18,6 +20,42 @@ except ImportError:
     except ImportError:
         tomllib = None
 
+# Loaded plugin modules, shared by every build: { path: (mtime, module) }
+_plugin_cache = {}
+
+# Computed keys defined by builders, per store: { key: number of users }.
+# Templates are shared by every widget showing them, workspace [computed] keys
+# by every live build of it (windows sharing a store, a rebuild overlapping
+# the old UI's deleteLater); the key is removed with its last user.
+_computed_users = weakref.WeakKeyDictionary()
+
+
+def _use_computed(store, key, fn=None):
+    """Defines key as fn (if given) and counts one more user of it."""
+    users = _computed_users.setdefault(store, {})
+    # Defined outside the builders (e.g. current_strokes): never removed
+    external = key not in users and store.is_computed(key)
+    if fn is not None:
+        store.define_computed(key, fn)
+    if not external:
+        users[key] = users.get(key, 0) + 1
+
+
+def _release_all(store, keys):
+    """Releases every key in the list and empties it (so a second call is a no-op)."""
+    while keys:
+        _release_computed(store, keys.pop())
+
+
+def _release_computed(store, key):
+    users = _computed_users.get(store)
+    if not users or key not in users:
+        return
+    users[key] -= 1
+    if users[key] <= 0:
+        del users[key]
+        store.remove_computed(key)
+
 class LayoutBuilder:
     def __init__(self, workspace_name, base_dir, plugin_dir, state_store, command_handler=None):
         self.workspace_name = workspace_name
@@ -28,25 +66,38 @@ class LayoutBuilder:
         self.objects = {} 
         self.schema = {}
         self.required_paths = [] 
+        self.container = None
+        self.computed_keys = []  # Workspace [computed] keys this build uses (see dispose)
 
     def build(self) -> QWidget:
         self._load_and_merge_schema()
         if not self.schema:
             return self._create_main_container()
 
-        root_key = self.schema.get("root")
-        if not root_key:
-            raise ValueError("Config exists but missing 'root' key.")
-        
-        built = self._build_element(root_key)
-        
+        self._register_computed(self.schema.get("computed", {}))
+        self._register_macros(self.schema.get("macros", {}))
+
+        try:
+            root_key = self.schema.get("root")
+            if not root_key:
+                raise ValueError("Config exists but missing 'root' key.")
+
+            built = self._build_element(root_key)
+        except Exception:
+            self.dispose()
+            raise
+
         container = self._create_main_container()
+        # The workspace's computed keys go with its UI (workspace switch, rebuild,
+        # window closed). Not through the builder: it holds every widget of the UI
+        container.destroyed.connect(partial(_release_all, self.state_store, self.computed_keys))
         if isinstance(built, QLayout):
             container.setLayout(built)
         elif isinstance(built, QWidget):
             built.setParent(container)
         
         container.setStyleSheet(self._load_and_merge_css())
+        self.container = container
         return container
 
     def _create_main_container(self):
@@ -72,16 +123,27 @@ class LayoutBuilder:
         for p in paths_to_try:
             if os.path.exists(p):
                 try:
-                    spec = importlib.util.spec_from_file_location(widget_type, p)
-                    mod = importlib.util.module_from_spec(spec)
-                    sys.modules[widget_type] = mod
-                    spec.loader.exec_module(mod)
+                    mod = self._plugin_module(widget_type, p)
                     if hasattr(mod, "main"):
                         return mod.main()
                 except Exception as e:
                     print(f"Plugin Load Error ({p}): {e}")
         return None
 
+    def _plugin_module(self, widget_type, path):
+        """Executes a plugin file once; it is only re-executed after it changes on disk."""
+        mtime = os.path.getmtime(path)
+        cached = _plugin_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        spec = importlib.util.spec_from_file_location(widget_type, path)
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[widget_type] = mod
+        spec.loader.exec_module(mod)
+        _plugin_cache[path] = (mtime, mod)
+        return mod
+
     def _build_element(self, key):
         if key not in self.schema:
             lbl = QLabel(f"MISSING: {key}")
@@ -152,37 +214,59 @@ class LayoutBuilder:
                         setter(new_value)
                     except TypeError:
                         setter(str(new_value))
-                
-                self.state_store.subscribe(var_key, update_direct)
+
+                # Readable name for the state profiler
+                update_direct.__qualname__ = f"{type(instance).__name__}.{setter_name} <- ${var_key}"
+                self.state_store.subscribe(var_key, update_direct, owner=instance)
                 return
 
             # CASE 2: Template String (e.g. "Line: $active_line | Count: $count")
-            # We treat the result as a string and interpolate values.
-            unique_keys = set(matches)
-            
-            def update_template(_=None):
-                final_text = val
-                # Sort keys by length (desc) to avoid partial replacement issues (e.g. $id inside $idx)
-                sorted_keys = sorted(unique_keys, key=len, reverse=True)
-                
-                for key in sorted_keys:
-                    # Get latest value from store, default to empty string
-                    store_val = self.state_store.get(key, "")
-                    final_text = final_text.replace(f"${key}", str(store_val))
-                
-                setter(final_text)
-
-            # Subscribe to ALL variables found in the string
-            for key in unique_keys:
-                self.state_store.subscribe(key, update_template)
-            
-            # Initial Run
-            update_template()
+            # Backed by a shared computed key: it is only re-rendered when one of
+            # its variables changes, once for every widget using the same template.
+            template_key = f"template:{val}"
+            fn = None if self.state_store.is_computed(template_key) else computed.template(val)
+            _use_computed(self.state_store, template_key, fn)
+            instance.destroyed.connect(partial(_release_computed, self.state_store, template_key))
+
+            def update_template(text):
+                setter(text)
+
+            update_template.__qualname__ = f"{type(instance).__name__}.{setter_name} <- {val!r}"
+            self.state_store.subscribe(template_key, update_template, owner=instance)
 
         else:
             # Standard static property
             setter(val)
 
+    def _register_computed(self, definitions):
+        """Declares the workspace's [computed] keys on the store."""
+        for key, spec in definitions.items():
+            try:
+                _use_computed(self.state_store, key, computed.from_spec(spec))
+            except ValueError as e:
+                print(f"Computed Definition Error ({key}): {e}")
+                continue
+            self.computed_keys.append(key)
+
+    def dispose(self):
+        """Releases the workspace's [computed] keys (removed once no other build uses them)."""
+        _release_all(self.state_store, self.computed_keys)
+
+    def _register_macros(self, definitions):
+        """
+        Publishes the workspace's [macros] on the 'macros' state key, for
+        'run --macro=<name>'. Each macro is a list of command strings.
+        """
+        macros = {}
+        for name, lines in definitions.items():
+            if isinstance(lines, str):
+                lines = [lines]
+            if not isinstance(lines, list) or not all(isinstance(l, str) for l in lines):
+                print(f"Macro Definition Error ({name}): expected a list of command strings")
+                continue
+            macros[name] = lines
+        self.state_store.set("macros", macros)
+
     def _attach_child(self, parent, child):
         if isinstance(parent, QLayout):
             if isinstance(child, QWidget): parent.addWidget(child)
@@ -229,10 +313,170 @@ class LayoutBuilder:
             with open(base_path + ".toml", 'rb') as f: data.update(tomllib.load(f))
         return data
 
+    def _css_paths(self):
+        return [os.path.join(self.base_dir, "defaults", "default.css"),
+                os.path.join(self.base_dir, f"{self.workspace_name}.css")]
+
     def _load_and_merge_css(self):
         parts = []
-        for p in [os.path.join(self.base_dir, "defaults", "default.css"),
-                  os.path.join(self.base_dir, f"{self.workspace_name}.css")]:
+        for p in self._css_paths():
             if os.path.exists(p):
                 with open(p, 'r') as f: parts.append(f.read())
         return "\n".join(parts)
+
+    # --- Hot Reload ---
+
+    def source_files(self):
+        """Schema and CSS files this workspace is built from (whether they exist yet or not)."""
+        bases = [os.path.join(self.base_dir, "defaults", "default"),
+                 os.path.join(self.base_dir, self.workspace_name)]
+        bases += [os.path.join(self.base_dir, r) for r in self.required_paths]
+        files = {b + ext for b in bases for ext in (".json", ".toml")}
+        files.update(self._css_paths())
+        return {os.path.normpath(f) for f in files}
+
+    def reload(self, changed_paths):
+        """
+        Applies edited files to the UI that is already built.
+        CSS-only edits are re-applied in place; otherwise the old and new
+        merged schema are diffed and only elements whose definition (or
+        plugin code) changed are rebuilt, so the rest keep their state.
+        Returns False when the change needs a full rebuild instead.
+        """
+        if self.container is None:
+            return False
+        changed = {os.path.normpath(p) for p in changed_paths}
+        css_paths = {os.path.normpath(p) for p in self._css_paths()}
+
+        plugin_dir = os.path.normpath(self.plugin_dir)
+        plugin_types = {
+            os.path.splitext(os.path.basename(p))[0].lower()
+            for p in changed if p.endswith(".py") and os.path.dirname(p) == plugin_dir
+        }
+        schema_changed = bool(changed & (self.source_files() - css_paths))
+        if not schema_changed and not plugin_types:
+            if changed & css_paths:
+                self.apply_css()
+            return True
+
+        old_schema = self.schema
+        if schema_changed:
+            self.schema, self.required_paths = {}, []
+            self._load_and_merge_schema()
+
+        dirty = self._changed_elements(old_schema, self.schema, plugin_types)
+        if dirty is None:
+            return False
+        if old_schema.get("macros") != self.schema.get("macros"):
+            self._register_macros(self.schema.get("macros", {}))
+
+        for key in dirty:
+            if not self._replace_element(key, old_schema):
+                return False
+
+        self.apply_css()
+        print(f"   -> Hot reload: rebuilt {', '.join(dirty) if dirty else 'nothing'}")
+        return True
+
+    def apply_css(self):
+        if self.container is not None:
+            self.container.setStyleSheet(self._load_and_merge_css())
+
+    def _subtree(self, schema, key):
+        keys, stack = [], [key]
+        while stack:
+            k = stack.pop()
+            if k in keys or not isinstance(schema.get(k), dict):
+                continue
+            keys.append(k)
+            stack.extend(schema[k].get("children", []))
+        return keys
+
+    def _changed_elements(self, old, new, plugin_types):
+        """Topmost elements to rebuild, or None if only a full rebuild will do."""
+        for section in ("root", "computed", "require"):
+            if old.get(section) != new.get(section):
+                return None
+        root = new.get("root")
+        if not root:
+            return None
+
+        def element_type(data):
+            return str(data.get("type", "QWidget")).strip().strip("'\"").lower()
+
+        order = self._subtree(new, root)
+        dirty = {
+            k for k in order
+            if old.get(k) != new.get(k) or element_type(new[k]) in plugin_types
+        }
+        if root in dirty:
+            return None
+
+        # A rebuilt element rebuilds its children too
+        parents = {c: k for k in order for c in new[k].get("children", [])}
+        def has_dirty_ancestor(k):
+            k = parents.get(k)
+            while k is not None:
+                if k in dirty:
+                    return True
+                k = parents.get(k)
+            return False
+        return [k for k in order if k in dirty and not has_dirty_ancestor(k)]
+
+    def _replace_element(self, key, old_schema):
+        parent_key = next((k for k, d in self.schema.items()
+                           if isinstance(d, dict) and key in d.get("children", [])), None)
+        parent = self.objects.get(parent_key)
+        old = self.objects.get(key)
+        if parent is None or old is None:
+            return False
+        if not isinstance(parent, QBoxLayout) and not (isinstance(parent, QWidget) and isinstance(old, QWidget)):
+            return False  # e.g. a widget's own layout: rebuild everything
+
+        # Every check that does not need the new element comes before building it
+        index = -1
+        if isinstance(parent, QBoxLayout):
+            index = next((i for i in range(parent.count())
+                          if parent.itemAt(i).widget() is old or parent.itemAt(i).layout() is old), -1)
+            if index < 0:
+                return False
+
+        replaced = {k: self.objects.pop(k) for k in self._subtree(old_schema, key) if k in self.objects}
+        new = self._build_element(key)
+
+        if isinstance(parent, QBoxLayout):
+            stretch = parent.stretch(index)
+            parent.takeAt(index)
+            if isinstance(new, QWidget):
+                parent.insertWidget(index, new, stretch)
+            else:
+                parent.insertLayout(index, new, stretch)
+        elif isinstance(new, QWidget):
+            new.setParent(parent)
+            new.show()
+        else:
+            # A widget became a layout: drop it (and its subscriptions), old one stays
+            for k in self._subtree(self.schema, key):
+                self.objects.pop(k, None)
+            self.objects.update(replaced)
+            _dispose(new)
+            return False
+
+        _dispose(old)
+        return True
+
+
+def _dispose(obj):
+    """Deletes a replaced element; its owner-scoped state listeners go with it."""
+    if isinstance(obj, QLayout):
+        while obj.count():
+            item = obj.takeAt(0)
+            if item.widget() is not None:
+                _dispose(item.widget())
+            elif item.layout() is not None:
+                _dispose(item.layout())
+        obj.setParent(None)
+        obj.deleteLater()
+    elif isinstance(obj, QWidget):
+        obj.hide()
+        obj.deleteLater()
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+
+from PyQt6.QtGui import QImage, QPainter, QColor
+from PyQt6.QtCore import Qt, QPointF
+
+from app.gui.components.stroke import draw_strokes, strokes_bounds
+
+# Layers bigger than this (in device pixels) are not cached; callers draw vectors instead
+MAX_LAYER_PIXELS = 32 * 1024 * 1024
+
+
+class LineLayerCache:
+    """
+    Cached raster layers of whole lines, in world coordinates.
+
+    A layer is keyed by the line's stroke list, its length and a revision
+    number the owner bumps on non-append edits, so it is only re-rendered
+    when that line's content changes. Drawing a layer is a single image blit.
+    """
+    def __init__(self, max_layers=8):
+        self.max_layers = max_layers
+        self._layers = OrderedDict()  # { (index, color): (key, QImage, QPointF) }
+
+    def layer(self, index, strokes, color, dpr, revision=0):
+        """Returns (image, world_origin) for the line, or None if empty / too large."""
+        cache_key = (index, QColor(color).rgba())
+        content_key = (id(strokes), len(strokes), revision, dpr)
+
+        entry = self._layers.get(cache_key)
+        if entry is not None and entry[0] == content_key:
+            self._layers.move_to_end(cache_key)
+            return entry[1], entry[2]
+
+        rendered = self._render(strokes, color, dpr)
+        if rendered is None:
+            self._layers.pop(cache_key, None)
+            return None
+
+        self._layers[cache_key] = (content_key, rendered[0], rendered[1])
+        self._layers.move_to_end(cache_key)
+        while len(self._layers) > self.max_layers:
+            self._layers.popitem(last=False)
+        return rendered
+
+    def invalidate(self, index=None):
+        if index is None:
+            self._layers.clear()
+            return
+        for key in [k for k in self._layers if k[0] == index]:
+            del self._layers[key]
+
+    def _render(self, strokes, color, dpr):
+        bounds = strokes_bounds(strokes)
+        if bounds is None:
+            return None
+
+        # Pad by the widest stroke so outlines are not clipped
+        pad = max((max(getattr(s, "widths", None) or [2.0]) for s in strokes if s), default=2.0) + 2
+        bounds = bounds.adjusted(-pad, -pad, pad, pad)
+
+        w, h = int(bounds.width() * dpr) + 1, int(bounds.height() * dpr) + 1
+        if w * h > MAX_LAYER_PIXELS:
+            return None
+
+        image = QImage(w, h, QImage.Format.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(dpr)
+        image.fill(Qt.GlobalColor.transparent)
+
+        p = QPainter(image)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing)
+        p.translate(-bounds.topLeft())
+        draw_strokes(p, strokes, QColor(color))
+        p.end()
+        return image, QPointF(bounds.topLeft())
@@ -0,0 +1,129 @@
+from array import array
+
+from PyQt6.QtGui import QImage, QPainter, QPen
+from PyQt6.QtCore import Qt, QPointF, QRectF
+
+_INITIAL_POINTS = 256
+_INITIAL_IMAGE = 256  # px (world units) per side
+
+
+class LiveStroke:
+    """
+    The stroke being drawn, in world coordinates.
+
+    Points and widths go into preallocated arrays that double when full.
+    Segments are rasterised once, into a cached world-space image that also
+    grows by doubling, so a frame only strokes the segments added since the
+    previous one and blits the image: cost does not grow with stroke length.
+    """
+    def __init__(self, color=Qt.GlobalColor.black):
+        self.color = color
+        self.xy = array('d', bytes(16 * _INITIAL_POINTS))   # x0, y0, x1, y1, ...
+        self.ws = array('d', bytes(8 * _INITIAL_POINTS))
+        self.count = 0
+
+        self._image = None
+        self._origin = QPointF()   # World position of the image's top-left
+        self._dpr = 1.0
+        self._baked = 0            # Points whose segments are already in the image
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+        self._image = None
+        self._baked = 0
+
+    def append(self, x, y, width):
+        n = self.count
+        if n == len(self.ws):
+            self.xy.extend(array('d', bytes(16 * n)))
+            self.ws.extend(array('d', bytes(8 * n)))
+        self.xy[2 * n] = x
+        self.xy[2 * n + 1] = y
+        self.ws[n] = width
+        self.count = n + 1
+
+    def last_point(self):
+        n = self.count - 1
+        return QPointF(self.xy[2 * n], self.xy[2 * n + 1]) if n >= 0 else None
+
+    def points(self):
+        xy = self.xy
+        return [QPointF(xy[2 * i], xy[2 * i + 1]) for i in range(self.count)]
+
+    def widths(self):
+        return self.ws[:self.count].tolist()
+
+    # --- Rendering ---
+
+    def _segment_rect(self, start, end):
+        """World rect covering points [start, end), padded by the widest pen."""
+        xy, ws = self.xy, self.ws
+        xs = xy[2 * start:2 * end:2]
+        ys = xy[2 * start + 1:2 * end:2]
+        pad = max(ws[start:end]) + 2
+        return QRectF(min(xs) - pad, min(ys) - pad, max(xs) - min(xs) + 2 * pad, max(ys) - min(ys) + 2 * pad)
+
+    def _ensure_image(self, needed, dpr):
+        """Makes the image cover 'needed', doubling it (and keeping its content) when it does not."""
+        if self._image is None:
+            size = max(_INITIAL_IMAGE, needed.width(), needed.height())
+            target = QRectF(needed.center().x() - size / 2, needed.center().y() - size / 2, size, size)
+        else:
+            target = QRectF(self._origin, QRectF(self._image.rect()).size() / dpr)
+            if target.contains(needed):
+                return
+            while not target.contains(needed):
+                # Double towards the side that overflows
+                w, h = target.width(), target.height()
+                left = w if needed.left() < target.left() else 0
+                right = w if needed.right() > target.right() and not left else 0
+                top = h if needed.top() < target.top() else 0
+                bottom = h if needed.bottom() > target.bottom() and not top else 0
+                target = target.adjusted(-left, -top, right, bottom)
+
+        image = QImage(int(target.width() * dpr) + 1, int(target.height() * dpr) + 1,
+                       QImage.Format.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(dpr)
+        image.fill(Qt.GlobalColor.transparent)
+        if self._image is not None:
+            p = QPainter(image)
+            p.drawImage(self._origin - target.topLeft(), self._image)
+            p.end()
+        self._image = image
+        self._origin = target.topLeft()
+        self._dpr = dpr
+
+    def _bake(self, dpr):
+        """Rasterises segments added since the last frame into the cached image."""
+        if self._image is not None and self._dpr != dpr:
+            self._image = None  # Moved to a screen with another DPR: redraw everything
+        if self._image is None:
+            self._baked = 0
+
+        start = max(self._baked - 1, 0)
+        if self.count - start < 2:
+            return
+        self._ensure_image(self._segment_rect(start, self.count), dpr)
+
+        xy, ws = self.xy, self.ws
+        p = QPainter(self._image)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing)
+        p.translate(-self._origin)
+        pen = QPen(self.color, 1, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin)
+        for i in range(start + 1, self.count):
+            pen.setWidthF((ws[i - 1] + ws[i]) / 2)
+            p.setPen(pen)
+            p.drawLine(QPointF(xy[2 * i - 2], xy[2 * i - 1]), QPointF(xy[2 * i], xy[2 * i + 1]))
+        p.end()
+        self._baked = self.count
+
+    def draw(self, painter, dpr=1.0):
+        """Draws the stroke with a world-translated painter."""
+        if self.count < 2:
+            return
+        self._bake(dpr)
+        if self._image is not None:
+            painter.drawImage(self._origin, self._image)
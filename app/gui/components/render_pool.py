@@ -0,0 +1,38 @@
+"""
+Background QImage rendering, shared by the thumbnail renderer and the canvas
+tile cache: a private QThreadPool and a job that renders on it and hands the
+image back through the owner's 'ready' signal.
+"""
+from PyQt6.QtGui import QImage
+from PyQt6.QtCore import QRunnable, QThreadPool
+
+
+def render_pool(parent, max_threads=None):
+    pool = QThreadPool(parent)
+    if max_threads is None:
+        # Leave a core for the GUI thread
+        max_threads = max(1, QThreadPool.globalInstance().maxThreadCount() - 1)
+    pool.setMaxThreadCount(max_threads)
+    return pool
+
+
+class RenderJob(QRunnable):
+    """
+    Runs render(*args) on a pool thread and emits ready(key, generation, image),
+    with a null QImage when render returned None. The owner keeps the job in
+    its own bookkeeping (queued, running, superseded) until that arrives.
+    """
+    def __init__(self, ready, key, generation, render, *args):
+        super().__init__()
+        # The owner keeps the Python reference; Qt must not delete it
+        self.setAutoDelete(False)
+        self.ready = ready
+        self.key = key
+        self.generation = generation
+        self.render = render
+        self.args = args
+
+    def run(self):
+        image = self.render(*self.args)
+        # Queued to the GUI thread: the owner lives there
+        self.ready.emit(self.key, self.generation, image if image is not None else QImage())
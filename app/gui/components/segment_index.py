@@ -0,0 +1,158 @@
+import math
+
+from PyQt6.QtCore import Qt, QPointF
+
+
+class SegmentGrid:
+    """
+    Uniform grid over the segments of a line's strokes, for hit testing.
+
+    Each cell lists the (stroke, segment) pairs whose padded bounding box
+    touches it, so an eraser or lasso only checks the few segments near it
+    instead of every point of the line. Strokes are added and removed
+    individually, so edits update the index incrementally.
+    """
+    def __init__(self, cell=32.0):
+        self.cell = float(cell)
+        self.cells = {}     # { (cx, cy): {stroke_id: set(segment indices)} }
+        self.strokes = {}   # { stroke_id: stroke }
+        self._touched = {}  # { stroke_id: [cells] } for removal
+
+    def __len__(self):
+        return len(self.strokes)
+
+    def _cell_range(self, x0, y0, x1, y1):
+        c = self.cell
+        return (math.floor(x0 / c), math.floor(y0 / c), math.floor(x1 / c), math.floor(y1 / c))
+
+    def add(self, stroke):
+        sid = id(stroke)
+        if sid in self.strokes or not stroke:
+            return
+        self.strokes[sid] = stroke
+        touched = self._touched[sid] = []
+        widths = getattr(stroke, "widths", None)
+
+        last = len(stroke) - 1
+        for i in range(max(last, 1)):
+            a, b = stroke[i], stroke[min(i + 1, last)]
+            pad = (max(widths[i], widths[min(i + 1, last)]) / 2) if widths else 1.0
+            cx0, cy0, cx1, cy1 = self._cell_range(min(a.x(), b.x()) - pad, min(a.y(), b.y()) - pad,
+                                                  max(a.x(), b.x()) + pad, max(a.y(), b.y()) + pad)
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    key = (cx, cy)
+                    bucket = self.cells.get(key)
+                    if bucket is None:
+                        bucket = self.cells[key] = {}
+                    segments = bucket.get(sid)
+                    if segments is None:
+                        segments = bucket[sid] = set()
+                        touched.append(key)
+                    segments.add(i)
+
+    def remove(self, stroke):
+        sid = id(stroke)
+        if self.strokes.pop(sid, None) is None:
+            return
+        for key in self._touched.pop(sid, ()):
+            bucket = self.cells.get(key)
+            if bucket is not None:
+                bucket.pop(sid, None)
+                if not bucket:
+                    del self.cells[key]
+
+    def _candidates(self, x0, y0, x1, y1):
+        found = {}
+        cx0, cy0, cx1, cy1 = self._cell_range(x0, y0, x1, y1)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    for sid, segments in bucket.items():
+                        found.setdefault(sid, set()).update(segments)
+        return found
+
+    def hit(self, x, y, radius):
+        """
+        Segments within radius (plus half the stroke width) of (x, y), as
+        [(stroke, set(hit segment indices), set(point indices within reach))].
+        """
+        hits = []
+        for sid, segments in self._candidates(x - radius, y - radius, x + radius, y + radius).items():
+            stroke = self.strokes[sid]
+            widths = getattr(stroke, "widths", None)
+            last = len(stroke) - 1
+            hit_segments, hit_points = set(), set()
+            for i in segments:
+                j = min(i + 1, last)
+                a, b = stroke[i], stroke[j]
+                reach = radius + ((widths[i] + widths[j]) / 4 if widths else 1.0)
+                if _segment_distance_sq(x, y, a.x(), a.y(), b.x(), b.y()) <= reach * reach:
+                    hit_segments.add(i)
+                    for k in (i, j):
+                        p = stroke[k]
+                        if (p.x() - x) ** 2 + (p.y() - y) ** 2 <= reach * reach:
+                            hit_points.add(k)
+            if hit_segments:
+                hits.append((stroke, hit_segments, hit_points))
+        return hits
+
+    def inside(self, polygon, fraction=0.5):
+        """Strokes with at least 'fraction' of their points inside the (world) QPolygonF."""
+        rect = polygon.boundingRect()
+        selected = []
+        for sid in self._candidates(rect.left(), rect.top(), rect.right(), rect.bottom()):
+            stroke = self.strokes[sid]
+            inside = sum(1 for p in stroke if polygon.containsPoint(QPointF(p), Qt.FillRule.OddEvenFill))
+            if inside and inside >= fraction * len(stroke):
+                selected.append(stroke)
+        return selected
+
+
+class StrokeGrid:
+    """
+    Uniform grid over the bounding boxes of whole strokes, for "which strokes
+    can touch this rect" (tile rendering). One entry per stroke and cell
+    rather than per segment, so it is cheap to build over a large line.
+    Strokes are referred to by their position in the caller's list, and
+    queries return positions in that order (the drawing order).
+    """
+    def __init__(self, cell=256.0):
+        self.cell = float(cell)
+        self.cells = {}  # { (cx, cy): [stroke positions] }
+
+    def _cell_range(self, rect):
+        c = self.cell
+        return (math.floor(rect.left() / c), math.floor(rect.top() / c),
+                math.floor(rect.right() / c), math.floor(rect.bottom() / c))
+
+    def add(self, position, rect):
+        cx0, cy0, cx1, cy1 = self._cell_range(rect)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self.cells.setdefault((cx, cy), []).append(position)
+
+    def query(self, rect):
+        found = set()
+        cx0, cy0, cx1, cy1 = self._cell_range(rect)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            # Zoomed far out: fewer occupied cells than cells in the rect
+            for (cx, cy), positions in self.cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    found.update(positions)
+        else:
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    found.update(self.cells.get((cx, cy), ()))
+        return sorted(found)
+
+
+def _segment_distance_sq(px, py, ax, ay, bx, by):
+    dx, dy = bx - ax, by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return (px - ax) ** 2 + (py - ay) ** 2
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+    cx, cy = ax + t * dx, ay + t * dy
+    return (px - cx) ** 2 + (py - cy) ** 2
@@ -0,0 +1,172 @@
+from PyQt6.QtGui import QPainterPath, QPolygonF, QPen, QBrush
+from PyQt6.QtCore import Qt, QPointF, QRectF
+
+DEFAULT_WIDTH = 2.0
+
+
+class Stroke(list):
+    """
+    A committed stroke: a list of world QPoints plus one width per point.
+
+    Still a plain list of QPoints for code that only needs positions
+    (drawPolyline, bounds loops). The variable width outline is tessellated
+    once, on first use, and cached; strokes are not edited after commit.
+    """
+    def __init__(self, points=(), widths=None):
+        super().__init__(points)
+        if widths is None:
+            widths = [DEFAULT_WIDTH] * len(self)
+        self.widths = list(widths)
+        self._outline = None
+        self._bounds = None
+
+    def __reduce__(self):
+        # Cached Qt geometry is not picklable; it is rebuilt on demand
+        return (Stroke, (list(self), self.widths))
+
+    def outline(self):
+        if self._outline is None:
+            self._outline = tessellate(self, self.widths)
+        return self._outline
+
+    def bounds(self):
+        """Bounding rect of the stroke's points (not including its width)."""
+        if self._bounds is None:
+            self._bounds = points_bounds(self)
+        return self._bounds
+
+
+def split_stroke(stroke, cut_segments, removed_points=()):
+    """
+    The pieces of a stroke left by a partial erase: points in removed_points
+    are dropped and the stroke is broken at every cut segment (i -> i + 1).
+    Pieces of fewer than two points are dropped too.
+    """
+    widths = getattr(stroke, "widths", None) or [DEFAULT_WIDTH] * len(stroke)
+    removed = set(removed_points)
+    pieces, start = [], 0
+    for i in sorted(set(cut_segments) | removed):
+        end = i if i in removed else i + 1
+        if end - start >= 2:
+            pieces.append(Stroke(stroke[start:end], widths[start:end]))
+        start = max(start, i + 1)
+    if len(stroke) - start >= 2:
+        pieces.append(Stroke(stroke[start:], widths[start:]))
+    return pieces
+
+
+def as_stroke(points):
+    """Wraps legacy plain point lists so every stroke can be drawn the same way."""
+    return points if isinstance(points, Stroke) else Stroke(points)
+
+
+def points_bounds(points):
+    if not points:
+        return QRectF()
+    xs = [p.x() for p in points]
+    ys = [p.y() for p in points]
+    return QRectF(min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+
+
+def strokes_bounds(strokes):
+    """Union of the point bounds of all strokes, or None when there are no points."""
+    result = None
+    for stroke in strokes:
+        if not stroke:
+            continue
+        b = as_stroke(stroke).bounds()
+        result = b if result is None else result.united(b)
+    return result
+
+
+def _clean(points, widths):
+    # Drop consecutive duplicates; they have no direction
+    pts, ws = [], []
+    for p, w in zip(points, widths):
+        x, y = float(p.x()), float(p.y())
+        if pts and pts[-1][0] == x and pts[-1][1] == y:
+            continue
+        pts.append((x, y))
+        ws.append(float(w))
+    return pts, ws
+
+
+def offset_sides(pts, ws):
+    """
+    Left and right edge of a variable width polyline: each point offset along
+    its normal (from the neighbouring points) by half its width.
+    """
+    left, right = [], []
+    nx, ny = 0.0, 0.0
+    last = len(pts) - 1
+    for i, (x, y) in enumerate(pts):
+        ax, ay = pts[max(i - 1, 0)]
+        bx, by = pts[min(i + 1, last)]
+        tx, ty = bx - ax, by - ay
+        length = (tx * tx + ty * ty) ** 0.5
+        if length > 0:
+            nx, ny = -ty / length, tx / length
+        r = ws[i] / 2
+        left.append((x + nx * r, y + ny * r))
+        right.append((x - nx * r, y - ny * r))
+    return left, right
+
+
+def tessellate(points, widths):
+    """
+    Builds the filled outline of a variable width polyline.
+    The left side and the reversed right side form one polygon, capped with
+    circles at both ends.
+    """
+    path = QPainterPath()
+    path.setFillRule(Qt.FillRule.WindingFill)
+
+    pts, ws = _clean(points, widths)
+    if not pts:
+        return path
+    if len(pts) == 1:
+        r = ws[0] / 2
+        path.addEllipse(QPointF(*pts[0]), r, r)
+        return path
+
+    left, right = offset_sides(pts, ws)
+    right.reverse()
+    path.addPolygon(QPolygonF([QPointF(x, y) for x, y in left + right]))
+    path.closeSubpath()
+
+    path.addEllipse(QPointF(*pts[0]), ws[0] / 2, ws[0] / 2)
+    path.addEllipse(QPointF(*pts[-1]), ws[-1] / 2, ws[-1] / 2)
+    return path
+
+
+def triangle_vertices(points, widths, out):
+    """
+    Appends the stroke as independent triangles (x, y floats, two per segment)
+    to 'out', an array('f'). Used for GPU vertex buffers.
+    """
+    pts, ws = _clean(points, widths)
+    if len(pts) < 2:
+        return
+    left, right = offset_sides(pts, ws)
+    for i in range(1, len(pts)):
+        l0, r0, l1, r1 = left[i - 1], right[i - 1], left[i], right[i]
+        out.extend((l0[0], l0[1], r0[0], r0[1], l1[0], l1[1],
+                    l1[0], l1[1], r0[0], r0[1], r1[0], r1[1]))
+
+
+def draw_strokes(painter, strokes, color=Qt.GlobalColor.black, cosmetic_outline=False):
+    """
+    Fills the cached outline of every stroke: one drawPath per stroke.
+    cosmetic_outline adds a 1px edge so scaled-down thumbnails stay visible.
+    """
+    if cosmetic_outline:
+        pen = QPen(color, 1)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+    else:
+        painter.setPen(Qt.PenStyle.NoPen)
+    painter.setBrush(QBrush(color))
+
+    for stroke in strokes:
+        if stroke:
+            painter.drawPath(as_stroke(stroke).outline())
@@ -0,0 +1,94 @@
+from PyQt6.QtCore import QPointF
+
+
+class InputSample:
+    __slots__ = ("x", "y", "pressure", "t")
+
+    def __init__(self, x, y, pressure, t):
+        self.x = x
+        self.y = y
+        self.pressure = pressure
+        self.t = t  # Event timestamp in ms
+
+
+class StrokeInput:
+    """
+    Input stage between pointer events and the canvas.
+
+    Samples (mouse or tablet, with pressure) are buffered as they arrive and
+    the widget is asked for a single repaint; the paint drains every sample
+    received since the previous frame. Optionally extrapolates a predicted
+    point from the recent velocity to hide input latency.
+    """
+    def __init__(self, widget):
+        self.widget = widget
+        self.pending = []
+        self.active = False
+        self.frame_requested = False
+
+        # Prediction
+        self.predict = False
+        self.prediction_ms = 16.0
+        self.max_prediction_px = 40.0
+        self._prev = None
+        self._last = None
+
+    def begin(self, pos, pressure, t):
+        self.active = True
+        self.pending = []
+        self._prev = None
+        self._last = None
+        self.add(pos, pressure, t)
+
+    def add(self, pos, pressure, t):
+        if not self.active:
+            return
+        sample = InputSample(pos.x(), pos.y(), pressure, t)
+        self.pending.append(sample)
+        self._prev, self._last = self._last, sample
+        self.request_frame()
+
+    def hold(self):
+        """Repeats the last sample: the pen did not move, the canvas under it did."""
+        if self.active and self._last is not None:
+            last = self._last
+            self.add(QPointF(last.x, last.y), last.pressure, last.t)
+
+    def end(self):
+        """Returns the samples not yet drained and closes the stroke."""
+        self.active = False
+        self._prev = self._last = None
+        return self.take()
+
+    def take(self):
+        """Drains buffered samples. Called once per frame by the canvas."""
+        samples = self.pending
+        self.pending = []
+        self.frame_requested = False
+        return samples
+
+    def request_frame(self):
+        if not self.frame_requested:
+            self.frame_requested = True
+            self.widget.request_paint()
+
+    def predicted_point(self):
+        """Widget position the pen is expected at one frame from now, or None."""
+        if not (self.predict and self.active and self._prev and self._last):
+            return None
+        dt = self._last.t - self._prev.t
+        if dt <= 0:
+            return None
+
+        scale = self.prediction_ms / dt
+        dx = (self._last.x - self._prev.x) * scale
+        dy = (self._last.y - self._prev.y) * scale
+
+        # Clamp so a sudden jump does not draw a long phantom segment
+        length = (dx * dx + dy * dy) ** 0.5
+        if length > self.max_prediction_px:
+            dx *= self.max_prediction_px / length
+            dy *= self.max_prediction_px / length
+        if length < 0.5:
+            return None
+        return QPointF(self._last.x + dx, self._last.y + dy)
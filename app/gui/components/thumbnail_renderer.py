@@ -0,0 +1,103 @@
+from PyQt6.QtGui import QImage, QPainter, QColor
+from PyQt6.QtCore import Qt, QObject, QRectF, pyqtSignal
+
+from app.gui.components.render_pool import RenderJob, render_pool
+from app.gui.components.stroke import draw_strokes, strokes_bounds
+
+
+def render_thumbnail(strokes, width, height, dpr=1.0, margin=0, background=None):
+    """
+    Renders strokes scaled to fit (width x height), centered, into a QImage
+    (transparent unless a background color is given). QImage painting is
+    thread-safe, so this runs on worker threads and in headless renders.
+    Returns None when there is nothing to draw.
+    """
+    bounds = strokes_bounds(strokes)
+    if bounds is None or bounds.width() <= 0 or bounds.height() <= 0:
+        return None
+
+    image = QImage(int(width * dpr), int(height * dpr), QImage.Format.Format_ARGB32_Premultiplied)
+    image.setDevicePixelRatio(dpr)
+    image.fill(QColor(background) if background is not None else Qt.GlobalColor.transparent)
+
+    draw_rect = QRectF(0, 0, width, height).adjusted(margin, margin, -margin, -margin)
+    scale = min(draw_rect.width() / bounds.width(), draw_rect.height() / bounds.height())
+    offset_x = draw_rect.left() + (draw_rect.width() - bounds.width() * scale) / 2
+    offset_y = draw_rect.top() + (draw_rect.height() - bounds.height() * scale) / 2
+
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.translate(offset_x, offset_y)
+    painter.scale(scale, scale)
+    painter.translate(-bounds.x(), -bounds.y())
+
+    # Same cached outlines as the canvas; the cosmetic edge keeps them visible when tiny
+    draw_strokes(painter, strokes, cosmetic_outline=True)
+    painter.end()
+    return image
+
+
+class ThumbnailRenderer(QObject):
+    """
+    Renders thumbnails on a private QThreadPool.
+
+    Each request carries a generation number; results are delivered through
+    the 'ready' signal on the GUI thread and the caller drops any whose
+    generation is stale. A newer request for the same key replaces the
+    queued one, and cancel() removes work that has not started yet.
+    """
+    ready = pyqtSignal(object, int, QImage)  # key, generation, image (null when empty)
+
+    PRIORITY_VISIBLE = 10
+    PRIORITY_PREFETCH = 0
+
+    def __init__(self, parent=None, max_threads=None):
+        super().__init__(parent)
+        self.pool = render_pool(self, max_threads)
+        self.jobs = {}  # { key: RenderJob } queued or running
+        self._superseded = {}  # { (key, generation): job } replaced while running; kept alive until done
+        self.ready.connect(self._on_ready)
+
+    def request(self, key, generation, strokes, width, height, dpr=1.0, priority=PRIORITY_VISIBLE):
+        queued = self.jobs.get(key)
+        if queued is not None:
+            if queued.generation == generation:
+                # Already queued: only re-prioritise if it has not started
+                if priority > queued.priority and self.pool.tryTake(queued):
+                    queued.priority = priority
+                    self.pool.start(queued, priority)
+                return
+            if not self.pool.tryTake(queued):
+                self._superseded[(key, queued.generation)] = queued
+
+        # A snapshot of the list: the GUI thread may append while we render
+        job = RenderJob(self.ready, key, generation, render_thumbnail, list(strokes), width, height, dpr)
+        job.priority = priority
+        self.jobs[key] = job
+        self.pool.start(job, priority)
+
+    def cancel(self, key):
+        """Drops queued work for key. Returns False if it is already running."""
+        job = self.jobs.get(key)
+        if job is None:
+            return True
+        if self.pool.tryTake(job):
+            del self.jobs[key]
+            return True
+        return False
+
+    def is_pending(self, key, generation):
+        job = self.jobs.get(key)
+        return job is not None and job.generation == generation
+
+    def shutdown(self):
+        self.pool.clear()
+        self.pool.waitForDone()
+        self.jobs.clear()
+        self._superseded.clear()
+
+    def _on_ready(self, key, generation, image):
+        self._superseded.pop((key, generation), None)
+        job = self.jobs.get(key)
+        if job is not None and job.generation == generation:
+            del self.jobs[key]
@@ -0,0 +1,240 @@
+import math
+import threading
+from collections import OrderedDict
+
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtCore import Qt, QObject, QRectF, pyqtSignal
+
+from app.gui.components.render_pool import RenderJob, render_pool
+from app.gui.components.segment_index import StrokeGrid
+from app.gui.components.stroke import draw_strokes, as_stroke
+
+TILE_PX = 256      # Tile edge in device pixels
+MAX_TILES = 192    # ~48 MB of ARGB32 tiles, across every cached scale
+GRID_CELL = 256.0  # World units per StrokeGrid cell
+_PAD = 16          # World units added around stroke bounds for the pen width
+
+
+def tile_rect(scale, tx, ty):
+    """World rect of tile (tx, ty) at 'scale' device pixels per world unit."""
+    size = TILE_PX / scale
+    return QRectF(tx * size, ty * size, size, size)
+
+
+def _strokes_in(strokes, rect):
+    rect = rect.adjusted(-_PAD, -_PAD, _PAD, _PAD)
+    return [s for s in strokes if s and as_stroke(s).bounds().intersects(rect)]
+
+
+def _paint_into(image, strokes, scale, rect):
+    p = QPainter(image)
+    p.setRenderHint(QPainter.RenderHint.Antialiasing)
+    p.scale(scale, scale)
+    p.translate(-rect.topLeft())
+    draw_strokes(p, strokes)
+    p.end()
+
+
+class _Snapshot:
+    """
+    The strokes of one epoch, shared by its tile jobs and the vector fallback.
+    Append-only: the GUI thread extends it as strokes are committed, a job
+    only reads the first 'count' it was given. Bounds and the StrokeGrid are
+    built once, by whichever thread needs them first.
+    """
+    def __init__(self, strokes):
+        self.strokes = list(strokes)
+        self.bounds = []   # World bounds of the indexed strokes (None when empty)
+        self.grid = StrokeGrid(GRID_CELL)
+        self.lock = threading.Lock()
+
+    def strokes_in(self, rect, count):
+        rect = rect.adjusted(-_PAD, -_PAD, _PAD, _PAD)
+        with self.lock:
+            for i in range(len(self.bounds), count):
+                stroke = self.strokes[i]
+                bounds = as_stroke(stroke).bounds() if stroke else None
+                self.bounds.append(bounds)
+                if bounds is not None:
+                    self.grid.add(i, bounds)
+            positions = self.grid.query(rect)
+        return [self.strokes[i] for i in positions
+                if i < count and self.bounds[i].intersects(rect)]
+
+    def render_tile(self, count, scale, tx, ty):
+        """Renders the strokes crossing a tile into a QImage, or None if the tile is empty."""
+        rect = tile_rect(scale, tx, ty)
+        hits = self.strokes_in(rect, count)
+        if not hits:
+            return None
+        image = QImage(TILE_PX, TILE_PX, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+        _paint_into(image, hits, scale, rect)
+        return image
+
+
+class TileCache(QObject):
+    """
+    Multi-resolution raster tiles of the active line's committed strokes.
+
+    Tiles are TILE_PX device pixels square and keyed by (scale, tx, ty), where
+    scale is device pixels per world unit (zoom * DPR). A frame blits the
+    tiles cached at its exact scale; missing ones are requested from a worker
+    pool and, meanwhile, covered by the nearest scale that is cached (slightly
+    resampled) or, failing that, drawn as vectors. Appended strokes are
+    painted into the cached tiles they touch; any other edit (new revision or
+    another stroke list) drops the cache. Tiles are evicted least recently used.
+    """
+    ready = pyqtSignal(object, int, QImage)  # key, epoch, image (null when empty)
+    updated = pyqtSignal()                   # New tiles arrived: repaint
+
+    def __init__(self, parent=None, max_threads=None, max_tiles=MAX_TILES):
+        super().__init__(parent)
+        self.pool = render_pool(self, max_threads)
+        self.max_tiles = max_tiles
+
+        self.tiles = OrderedDict()  # { (scale, tx, ty): QImage or None (empty tile) }
+        self.jobs = {}              # { key: RenderJob } queued or running
+        self._running = {}          # { (key, epoch): job } dropped while running; kept alive until done
+
+        self.epoch = 0              # Bumped whenever the cached content is dropped
+        self.source = None          # The stroke list the tiles were rendered from
+        self.snapshot = None        # _Snapshot of the source, shared by the epoch's jobs
+        self.count = 0              # How many of its strokes the tiles include
+        self.revision = 0
+        self.ready.connect(self._on_ready)
+
+    # --- Content sync ---
+
+    def sync(self, strokes, revision=0):
+        """Follows the stroke list: appends are painted into cached tiles, anything else resets."""
+        if strokes is not self.source or revision != self.revision or len(strokes) < self.count:
+            self.reset()
+            self.source = strokes
+            self.snapshot = _Snapshot(strokes)
+            self.revision = revision
+            self.count = len(strokes)
+            return
+        if len(strokes) > self.count:
+            added = strokes[self.count:]
+            self.snapshot.strokes.extend(added)
+            self.count = len(strokes)
+            for key in list(self.tiles):
+                self._patch(key, added)
+
+    def reset(self):
+        self.epoch += 1
+        self.tiles.clear()
+        for key, job in list(self.jobs.items()):
+            if not self.pool.tryTake(job):
+                self._running[(key, job.generation)] = job
+        self.jobs.clear()
+
+    def _patch(self, key, strokes):
+        rect = tile_rect(*key)
+        hits = _strokes_in(strokes, rect)
+        if not hits:
+            return
+        image = self.tiles.get(key)
+        if image is None:
+            image = QImage(TILE_PX, TILE_PX, QImage.Format.Format_ARGB32_Premultiplied)
+            image.fill(Qt.GlobalColor.transparent)
+            self.tiles[key] = image
+        _paint_into(image, hits, key[0], rect)
+
+    # --- Painting ---
+
+    def paint(self, painter, view, scale):
+        """
+        Draws the synced strokes inside 'view' (a world rect) with a
+        world-transformed painter. 'scale' is the frame's device pixels per
+        world unit; tiles are pixel-aligned when the offset is whole pixels.
+        """
+        scale = round(scale, 4)
+        size = TILE_PX / scale
+        tx0, tx1 = math.floor(view.left() / size), math.floor(view.right() / size)
+        ty0, ty1 = math.floor(view.top() / size), math.floor(view.bottom() / size)
+
+        # Queued work for other scales or tiles that scrolled away is dropped
+        visible = {(scale, tx, ty) for tx in range(tx0, tx1 + 1) for ty in range(ty0, ty1 + 1)}
+        for key in [k for k in self.jobs if k not in visible]:
+            if self.pool.tryTake(self.jobs[key]):
+                del self.jobs[key]
+
+        missing = []
+        for ty in range(ty0, ty1 + 1):
+            for tx in range(tx0, tx1 + 1):
+                key = (scale, tx, ty)
+                if key in self.tiles:
+                    self.tiles.move_to_end(key)
+                    image = self.tiles[key]
+                    if image is not None:
+                        painter.drawImage(tile_rect(*key), image)
+                else:
+                    missing.append(tile_rect(*key))
+                    self._request(key)
+
+        if missing:
+            self._paint_fallback(painter, missing, scale)
+
+    def _paint_fallback(self, painter, rects, scale):
+        """Covers missing tiles from the nearest cached scale, else with vectors."""
+        scales = sorted({k[0] for k in self.tiles if k[0] != scale}, key=lambda s: abs(math.log(s / scale)))
+        vectors = []
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        for rect in rects:
+            for other in scales:
+                size = TILE_PX / other
+                keys = [(other, tx, ty)
+                        for tx in range(math.floor(rect.left() / size), math.floor((rect.right() - 1e-6) / size) + 1)
+                        for ty in range(math.floor(rect.top() / size), math.floor((rect.bottom() - 1e-6) / size) + 1)]
+                if all(k in self.tiles for k in keys):
+                    painter.setClipRect(rect)
+                    for k in keys:
+                        if self.tiles[k] is not None:
+                            painter.drawImage(tile_rect(*k), self.tiles[k])
+                    break
+            else:
+                vectors.append(rect)
+        painter.restore()
+
+        if vectors and self.source:
+            bounds = vectors[0]
+            for rect in vectors[1:]:
+                bounds = bounds.united(rect)
+            painter.save()
+            painter.setClipRect(bounds)
+            draw_strokes(painter, self.snapshot.strokes_in(bounds, self.count))
+            painter.restore()
+
+    # --- Workers ---
+
+    def _request(self, key):
+        if key in self.jobs or not self.source:
+            return
+        # Every job of the epoch shares its snapshot; this one sees the first self.count strokes
+        job = RenderJob(self.ready, key, self.epoch, self.snapshot.render_tile, self.count, *key)
+        job.count = self.count
+        self.jobs[key] = job
+        self.pool.start(job)
+
+    def _on_ready(self, key, epoch, image):
+        job = self._running.pop((key, epoch), None) or self.jobs.get(key)
+        if epoch != self.epoch or job is None or job.generation != epoch:
+            return
+        del self.jobs[key]
+
+        self.tiles[key] = None if image.isNull() else image
+        # Strokes committed while the tile was rendering
+        if job.count < self.count:
+            self._patch(key, self.source[job.count:self.count])
+        while len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+        self.updated.emit()
+
+    def shutdown(self):
+        self.pool.clear()
+        self.pool.waitForDone()
+        self.jobs.clear()
+        self._running.clear()
@@ -1,30 +1,84 @@
 import os
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal
 from app.gui.components.layout_builder import LayoutBuilder
+from app.gui.components.workspace_watcher import WorkspaceWatcher
 from app.core.state_manager import StateStore
 from app.core.action_dispatcher import ActionDispatcher # <--- Import
+from app.core.document_model import DocumentModel
+from app.core import computed
 
 class WorkspaceSwitcher(QWidget):
-    def __init__(self, base_dir, plugin_dir):
+    # Workspace files were created or removed (the list needs a rescan)
+    workspaces_changed = pyqtSignal()
+
+    def __init__(self, base_dir, plugin_dir, shared=None):
+        """shared: another WorkspaceSwitcher whose state (and open document) this one shows too."""
         super().__init__()
         self.base_dir = base_dir
         self.plugin_dir = plugin_dir
         self.current_ui = None
+        self.builder = None
+        self.workspace_name = None
+        self.watcher = None
+        self.server = None
         
         # 1. Core Logic Setup
-        self.state_store = StateStore() 
-        self.dispatcher = ActionDispatcher(self.state_store) # <--- Init Dispatcher
+        if shared is not None:
+            # Another window on the same state: commands and document are shared
+            self.state_store = shared.state_store
+            self.dispatcher = shared.dispatcher
+        else:
+            self.state_store = StateStore() 
+            self.dispatcher = ActionDispatcher(self.state_store) # <--- Init Dispatcher
 
-        # Default State
-        self.state_store.set("count", 0)
-        self.state_store.set("status", "System Ready")
+            # Default State
+            self.state_store.set("count", 0)
+            self.state_store.set("status", "System Ready")
+            self.state_store.define_computed("current_strokes", computed.current_strokes)
+            DocumentModel.of(self.state_store)
         
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(0, 0, 0, 0)
 
+    def watch(self, enabled=True):
+        """Hot reload: edits to workspace TOML / CSS / plugin code apply without 'Reload'."""
+        if enabled and self.watcher is None:
+            self.watcher = WorkspaceWatcher(
+                [self.base_dir, os.path.join(self.base_dir, "defaults"), self.plugin_dir], parent=self)
+            self.watcher.changed.connect(self.on_files_changed)
+            self.watcher.listing_changed.connect(self.workspaces_changed)
+        elif not enabled and self.watcher is not None:
+            self.watcher.deleteLater()
+            self.watcher = None
+
+    def serve(self, name=None):
+        """Accepts commands from other processes on a local socket (see command_server)."""
+        from app.gui.components.command_server import CommandServer, DEFAULT_NAME
+        if self.server is None:
+            self.server = CommandServer(self.dispatcher, parent=self)
+        return self.server.listen(name or DEFAULT_NAME)
+
+    def on_files_changed(self, paths):
+        if not self.workspace_name:
+            return
+        if self.builder is not None:
+            relevant = {p for p in paths if p in self.builder.source_files()
+                        or os.path.dirname(p) == os.path.normpath(self.plugin_dir)}
+            if not relevant:
+                return
+            try:
+                if self.builder.reload(relevant):
+                    return
+            except Exception as e:
+                print(f"⚠️ Hot reload failed ({e}), rebuilding workspace")
+        # Canvas content and other state live in the store, so a rebuild keeps them
+        self.load_workspace(self.workspace_name)
+
     def load_workspace(self, workspace_name):
         if not workspace_name: return
+        self.workspace_name = workspace_name
+        self.builder = None
         
         # 1. Cleanup old UI
         if self.current_ui:
@@ -32,9 +86,8 @@ class WorkspaceSwitcher(QWidget):
             self.current_ui.deleteLater()
             self.current_ui = None
 
-        # 2. Cleanup old Listeners (The Fix)
-        # This prevents the store from trying to update widgets that are about to die
-        self.state_store.clear_listeners()
+        # 2. Old listeners are owner-scoped: they unsubscribe themselves
+        # when the old widgets emit 'destroyed', so global state bindings survive.
 
         try:
             builder = LayoutBuilder(
@@ -45,6 +98,7 @@ class WorkspaceSwitcher(QWidget):
                 command_handler=self.dispatcher.dispatch 
             )
             self.current_ui = builder.build()
+            self.builder = builder
             self.layout.addWidget(self.current_ui)
         except Exception as e:
             self._show_error(workspace_name, str(e))
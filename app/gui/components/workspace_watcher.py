@@ -0,0 +1,71 @@
+import os
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+
+class WorkspaceWatcher(QObject):
+    """
+    Watches workspace, style and plugin files and reports changes in
+    debounced batches (an editor save often fires several events).
+
+    The directories are watched as well, so files created later are picked
+    up, and files replaced by an editor's atomic save are watched again.
+    """
+    changed = pyqtSignal(set)       # Changed, created or removed file paths
+    listing_changed = pyqtSignal()  # Files were created or removed
+
+    def __init__(self, directories, extensions=(".toml", ".json", ".css", ".py"), debounce_ms=150, parent=None):
+        super().__init__(parent)
+        self.directories = [os.path.normpath(d) for d in directories if os.path.isdir(d)]
+        self.extensions = tuple(extensions)
+        self.known = set()
+        self._pending = set()
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._on_changed)
+        self.watcher.directoryChanged.connect(self._on_changed)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self._flush)
+
+        if self.directories:
+            self.watcher.addPaths(self.directories)
+        self.known = self._list_files()
+        if self.known:
+            self.watcher.addPaths(sorted(self.known))
+
+    def _list_files(self):
+        files = set()
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(self.extensions) and entry.is_file():
+                            files.add(os.path.normpath(entry.path))
+            except OSError:
+                continue
+        return files
+
+    def _on_changed(self, path):
+        self._pending.add(os.path.normpath(path))
+        self.timer.start()
+
+    def _flush(self):
+        pending, self._pending = self._pending, set()
+        current = self._list_files()
+        added = current - self.known
+        removed = self.known - current
+        self.known = current
+
+        # Re-watch everything that exists: atomic saves drop the old inode's watch
+        watched = set(self.watcher.files())
+        missing = current - watched
+        if missing:
+            self.watcher.addPaths(sorted(missing))
+
+        changed = {p for p in pending if p not in self.directories} | added | removed
+        if added or removed:
+            self.listing_changed.emit()
+        if changed:
+            self.changed.emit(changed)
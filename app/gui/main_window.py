@@ -1,12 +1,21 @@
 import os
 from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QPushButton, QFrame
+from PyQt6.QtCore import Qt, QTimer
+from app.core.perf_monitor import startup
 from app.gui.components.workspace_switcher import WorkspaceSwitcher
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, shared=None, workspace=None):
+        """
+        shared: the MainWindow whose state and document this window also shows
+        (e.g. a presenter window next to the operator's); workspace: the one
+        to open first instead of the first in the list.
+        """
         super().__init__()
         self.setWindowTitle("App Core")
         self.resize(1000, 700)
+        self.windows = []  # Extra windows opened from this one (kept alive here)
+        self._initial_workspace = workspace
 
         # --- Resolve Paths Relative to this file ---
         # Current file is in app/gui/
@@ -31,6 +40,10 @@ class MainWindow(QMainWindow):
         btn_reload = QPushButton("Reload")
         btn_reload.clicked.connect(lambda: self.on_combo_change(self.combo.currentText()))
         toolbar.addWidget(btn_reload)
+
+        btn_window = QPushButton("New Window")
+        btn_window.clicked.connect(lambda: self.open_window(self.combo.currentText()))
+        toolbar.addWidget(btn_window)
         toolbar.addStretch()
         
         main_layout.addLayout(toolbar)
@@ -39,11 +52,38 @@ class MainWindow(QMainWindow):
         # --- Switcher ---
         self.switcher = WorkspaceSwitcher(
             base_dir=self.workspaces_path,
-            plugin_dir=self.widgets_path
+            plugin_dir=self.widgets_path,
+            shared=shared.switcher if shared is not None else None
         )
         main_layout.addWidget(self.switcher, stretch=1)
+        self.owns_state = shared is None
+        if shared is None:
+            # 'app window --workspace=...'
+            self.switcher.dispatcher.window_factory = self.open_window
+
+        # Startup: the shell paints first, then the first workspace is built
+        # (see paintEvent) and the rest of the list is discovered after that.
+        self._first_paint = True
+
+    def open_window(self, workspace=None):
+        """Another top-level window on the same state and document, with its own views."""
+        window = MainWindow(shared=self, workspace=workspace or None)
+        window.setWindowTitle(f"{self.windowTitle()} ({len(self.windows) + 2})")
+        # Closing it deletes it, and with it its views and their subscriptions
+        window.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        window.destroyed.connect(lambda: self.windows.remove(window) if window in self.windows else None)
+        self.windows.append(window)
+        window.show()
+        return window
 
-        self.scan_workspaces()
+    def closeEvent(self, event):
+        # Extra windows hold views of the same document: they close with it
+        for window in list(self.windows):
+            window.close()
+        if self.owns_state:
+            # Queued commands are dropped; idle pool workers (e.g. export processes) exit
+            self.switcher.dispatcher.queue.shutdown()
+        super().closeEvent(event)
 
     def _create_divider(self):
         line = QFrame()
@@ -51,29 +91,60 @@ class MainWindow(QMainWindow):
         line.setFrameShadow(QFrame.Shadow.Sunken)
         return line
 
-    def scan_workspaces(self):
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._first_paint:
+            self._first_paint = False
+            startup.mark("first paint (window shell)")
+            QTimer.singleShot(0, self._load_initial_workspace)
+
+    def _load_initial_workspace(self):
+        with startup.phase("find first workspace"):
+            # Something may have loaded one already (e.g. a scripted switch)
+            first = None if self.switcher.current_ui else (self._initial_workspace or self._first_workspace())
+        if first:
+            self.combo.blockSignals(True)
+            self.combo.addItem(first)
+            self.combo.blockSignals(False)
+            with startup.phase(f"build workspace '{first}'"):
+                self.on_combo_change(first)
+
+        # The full list is only needed once the user opens the combo
+        QTimer.singleShot(0, self._finish_startup)
+
+    def _finish_startup(self):
+        with startup.phase("scan workspaces"):
+            self.scan_workspaces(load_first=False)
+        with startup.phase("watch workspace files"):
+            self.switcher.workspaces_changed.connect(lambda: self.scan_workspaces(load_first=False))
+            self.switcher.watch()
+        startup.report()
+
+    def _workspace_entries(self):
         if not os.path.exists(self.workspaces_path):
             os.makedirs(self.workspaces_path)
-            
-        files = os.listdir(self.workspaces_path)
-        workspaces = set()
-        
-        for f in files:
-            name, ext = os.path.splitext(f)
-            # Ignore directories like 'defaults'
-            if os.path.isdir(os.path.join(self.workspaces_path, f)):
-                continue
-            if ext in ['.json', '.toml']:
-                workspaces.add(name)
-            
-        sorted_ws = sorted(list(workspaces))
+        # scandir: no extra stat() per file to skip directories like 'defaults'
+        with os.scandir(self.workspaces_path) as entries:
+            for entry in entries:
+                name, ext = os.path.splitext(entry.name)
+                if ext in ['.json', '.toml'] and not entry.is_dir():
+                    yield name
+
+    def _first_workspace(self):
+        return min(self._workspace_entries(), default=None)
+
+    def scan_workspaces(self, load_first=True):
+        sorted_ws = sorted(set(self._workspace_entries()))
+        current = self.combo.currentText()
         
         self.combo.blockSignals(True)
         self.combo.clear()
         self.combo.addItems(sorted_ws)
+        if current in sorted_ws:
+            self.combo.setCurrentText(current)
         self.combo.blockSignals(False)
 
-        if sorted_ws:
+        if sorted_ws and load_first:
             self.on_combo_change(sorted_ws[0])
 
     def on_combo_change(self, text):
@@ -1,11 +1,26 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QScrollArea, QFrame, QLabel
-from PyQt6.QtGui import QPainter, QPen, QColor, QMouseEvent
-from PyQt6.QtCore import Qt, pyqtSignal, QRectF
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QScrollArea, QFrame
+from PyQt6.QtGui import QPainter, QColor, QMouseEvent, QFont
+from PyQt6.QtCore import Qt, pyqtSignal, QRect, QTimer, QEvent
 from functools import partial
+from app.core.perf_monitor import timed_paint
+from app.gui.components.thumbnail_renderer import ThumbnailRenderer
 
 def main():
     return LinesList()
 
+# Installed once on the list container; buttons only flip their 'active' property
+LINES_STYLE = """
+    LineButton {
+        background-color: #ffffff;
+        border: 1px solid #ddd;
+        border-radius: 8px;
+    }
+    LineButton[active="true"] {
+        background-color: #e3f2fd;
+        border: 2px solid #2196F3;
+    }
+"""
+
 class LineButton(QFrame):
     clicked = pyqtSignal()
 
@@ -14,88 +29,62 @@ class LineButton(QFrame):
         self.index = index
         self.strokes = []
         self.is_active = False
+
+        # Thumbnail is rendered off the GUI thread; generation tags which strokes it shows
+        self.thumbnail = None
+        self.generation = 0
+        self.rendered_generation = 0
         
         self.setFixedSize(160, 120)
         self.setCursor(Qt.CursorShape.PointingHandCursor)
-        
-        self.default_style = """
-            LineButton { 
-                background-color: #ffffff; 
-                border: 1px solid #ddd; 
-                border-radius: 8px; 
-            }
-        """
-        self.active_style = """
-            LineButton { 
-                background-color: #e3f2fd; 
-                border: 2px solid #2196F3; 
-                border-radius: 8px; 
-            }
-        """
-        self.setStyleSheet(self.default_style)
+        self.setProperty("active", False)
 
-        self.layout = QVBoxLayout(self)
-        self.label = QLabel(f"Line {index + 1}")
-        self.label.setStyleSheet("background: transparent; color: #555; font-weight: bold;")
-        self.layout.addWidget(self.label)
-        self.layout.addStretch() 
+        # Title is painted (no QLabel per row): nothing to restyle on toggle
+        self.title = f"Line {index + 1}"
+        self.title_font = QFont(self.font())
+        self.title_font.setBold(True)
 
     def set_active(self, active: bool):
+        if active == self.is_active:
+            return
         self.is_active = active
-        self.setStyleSheet(self.active_style if active else self.default_style)
-        self.label.setStyleSheet(f"background: transparent; color: {'#2196F3' if active else '#555'}; font-weight: bold;")
+        # Re-polish against the shared LINES_STYLE; no stylesheet is parsed
+        self.setProperty("active", active)
+        self.style().unpolish(self)
+        self.style().polish(self)
+        self.update()
 
     def set_strokes(self, strokes):
         self.strokes = strokes
-        self.update() 
+        self.generation += 1
+        if not strokes:
+            self.set_thumbnail(None, self.generation)
+        # Otherwise the previous thumbnail stays up until the new one arrives
+
+    def set_thumbnail(self, image, generation):
+        self.thumbnail = image if image is not None and not image.isNull() else None
+        self.rendered_generation = generation
+        self.update()
+
+    def needs_thumbnail(self):
+        return self.rendered_generation != self.generation
+
+    def thumbnail_rect(self):
+        return self.rect().adjusted(10, 30, -10, -10)
 
     def mousePressEvent(self, event: QMouseEvent):
         self.clicked.emit()
 
+    @timed_paint
     def paintEvent(self, event):
         super().paintEvent(event)
-        
-        if not self.strokes:
-            return
-
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        min_x, min_y = float('inf'), float('inf')
-        max_x, max_y = float('-inf'), float('-inf')
-        
-        for stroke in self.strokes:
-            for p in stroke:
-                if p.x() < min_x: min_x = p.x()
-                if p.x() > max_x: max_x = p.x()
-                if p.y() < min_y: min_y = p.y()
-                if p.y() > max_y: max_y = p.y()
-
-        content_w = max_x - min_x
-        content_h = max_y - min_y
-        if content_w <= 0 or content_h <= 0: return 
-
-        draw_rect = self.rect().adjusted(10, 30, -10, -10)
-        
-        scale_x = draw_rect.width() / content_w
-        scale_y = draw_rect.height() / content_h
-        scale = min(scale_x, scale_y)
-
-        scaled_w = content_w * scale
-        scaled_h = content_h * scale
-        offset_x = draw_rect.left() + (draw_rect.width() - scaled_w) / 2
-        offset_y = draw_rect.top() + (draw_rect.height() - scaled_h) / 2
-
-        painter.translate(offset_x, offset_y)
-        painter.scale(scale, scale)
-        painter.translate(-min_x, -min_y)
-
-        pen = QPen(Qt.GlobalColor.black, 2.0 / scale) 
-        painter.setPen(pen)
-        
-        for stroke in self.strokes:
-            if len(stroke) > 1:
-                painter.drawPolyline(stroke)
+        painter.setFont(self.title_font)
+        painter.setPen(QColor("#2196F3" if self.is_active else "#555"))
+        painter.drawText(self.rect().adjusted(11, 11, -11, 0),
+                         Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft, self.title)
+        if self.thumbnail is not None:
+            painter.drawImage(self.thumbnail_rect().topLeft(), self.thumbnail)
 
 
 class LinesList(QWidget):
@@ -126,34 +115,49 @@ class LinesList(QWidget):
         self.main_layout.addWidget(self.scroll)
 
         self.container = QWidget()
+        self.container.setStyleSheet(LINES_STYLE)
         self.container_layout = QVBoxLayout(self.container)
         self.container_layout.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignHCenter)
         self.container_layout.setSpacing(10)
         self.scroll.setWidget(self.container)
 
+        # Thumbnails render on a worker pool; visible rows first
+        self.thumbnails = ThumbnailRenderer(self)
+        self.thumbnails.ready.connect(self._on_thumbnail_ready)
+        self.destroyed.connect(self.thumbnails.shutdown)
+        self.scroll.verticalScrollBar().valueChanged.connect(self._schedule_thumbnails)
+
+        # Many line updates in one tick (document load) schedule once
+        self._thumb_timer = QTimer(self)
+        self._thumb_timer.setSingleShot(True)
+        self._thumb_timer.timeout.connect(self._schedule_thumbnails)
+        self.container.installEventFilter(self)
+
         self.add_line()
 
     def set_state_store(self, store):
         self.store = store
-        self.store.subscribe("canvas_data", self.on_canvas_data_update)
+        # One notification per changed line instead of the whole document
+        self.store.subscribe_path("canvas_data.*", self.on_line_data_update)
         # Also subscribe to active_line so we restore selection
         self.store.subscribe("active_line", self.setActiveLine)
 
-    def on_canvas_data_update(self, all_data):
+    def on_line_data_update(self, path, strokes):
         """
-        Called when store updates. Ensures buttons exist for all data.
+        Called for each line in canvas_data that changed. Ensures buttons exist for it.
         """
-        if not isinstance(all_data, dict): return
-        
-        for index, strokes in all_data.items():
-            # --- FIX: Create missing buttons on the fly ---
-            # If data exists for Line 5, but we only have Line 1, create lines 2-5.
-            while index >= self.next_id:
-                self.add_line()
-            # ----------------------------------------------
+        try:
+            index = int(path.rsplit(".", 1)[1])
+        except ValueError:
+            return
 
-            if index in self.buttons:
-                self.buttons[index].set_strokes(strokes)
+        # If data exists for Line 5, but we only have Line 1, create lines 2-5.
+        while index >= self.next_id:
+            self.add_line()
+
+        if index in self.buttons:
+            self.buttons[index].set_strokes(strokes or [])
+            self._thumb_timer.start(0)
 
     def add_line(self):
         line_id = self.next_id
@@ -161,6 +165,7 @@ class LinesList(QWidget):
 
         btn = LineButton(line_id)
         btn.clicked.connect(partial(self.on_line_click, line_id))
+        btn.set_active(line_id == self.current_active)
         
         self.container_layout.addWidget(btn)
         self.buttons[line_id] = btn
@@ -181,6 +186,61 @@ class LinesList(QWidget):
         except: pass
 
     def update_visuals(self, active_id):
+        # Only the previous and the new active button change
+        previous = self.buttons.get(self.current_active)
+        if previous is not None and self.current_active != active_id:
+            previous.set_active(False)
         self.current_active = active_id
-        for lid, btn in self.buttons.items():
-            btn.set_active(lid == active_id)
+        current = self.buttons.get(active_id)
+        if current is not None:
+            current.set_active(True)
+
+    # --- Thumbnails ---
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._thumb_timer.start(0)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._thumb_timer.start(0)
+
+    def eventFilter(self, obj, event):
+        # Rows move when the container grows (lines added / document loaded)
+        if obj is self.container and event.type() == QEvent.Type.Resize:
+            self._thumb_timer.start(0)
+        return super().eventFilter(obj, event)
+
+    def _schedule_thumbnails(self):
+        """
+        Queues stale thumbnails of visible rows at high priority and the next
+        screenful above/below as prefetch; queued work for rows further away
+        is cancelled (it is requested again when they scroll into view).
+        """
+        if self.container.height() < self.container_layout.sizeHint().height():
+            return  # Rows not laid out yet; the container resize reschedules
+        viewport = self.scroll.viewport()
+        visible = QRect(-self.container.x(), -self.container.y(), viewport.width(), viewport.height())
+        if not self.isVisible():
+            visible = QRect()
+        nearby = visible.adjusted(0, -visible.height(), 0, visible.height())
+
+        dpr = self.devicePixelRatioF()
+        for index, btn in self.buttons.items():
+            if not btn.needs_thumbnail():
+                continue
+            geometry = btn.geometry()
+            if geometry.intersects(visible):
+                priority = ThumbnailRenderer.PRIORITY_VISIBLE
+            elif geometry.intersects(nearby):
+                priority = ThumbnailRenderer.PRIORITY_PREFETCH
+            else:
+                self.thumbnails.cancel(index)
+                continue
+            rect = btn.thumbnail_rect()
+            self.thumbnails.request(index, btn.generation, btn.strokes, rect.width(), rect.height(), dpr, priority)
+
+    def _on_thumbnail_ready(self, index, generation, image):
+        btn = self.buttons.get(index)
+        if btn is not None and btn.generation == generation:
+            btn.set_thumbnail(image, generation)
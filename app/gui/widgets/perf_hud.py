@@ -0,0 +1,128 @@
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtGui import QKeySequence, QShortcut
+from PyQt6.QtCore import Qt, QTimer, QEvent
+from app.core.perf_monitor import monitor
+
+def main():
+    return PerfHud()
+
+class PerfHud(QLabel):
+    """
+    Toggleable performance overlay.
+    Place it as a child of a QWidget element (e.g. the canvas) to float over it:
+
+        [MyCanvas]
+        children = ["PerfHud"]
+
+    Visibility follows the 'perf_hud' state key ('perf toggle' command),
+    and the monitor only collects data while the HUD is shown.
+    """
+    def __init__(self):
+        super().__init__()
+        self.store = None
+        self.shortcut = None
+        self.toggle_key = "F12"
+        self.max_keys = 6
+
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents, True)
+        self.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        self.setStyleSheet("""
+            background-color: rgba(20, 20, 20, 190);
+            color: #7CFC00;
+            font-family: monospace;
+            font-size: 11px;
+            padding: 6px;
+            border-radius: 4px;
+        """)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(250)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def set_state_store(self, store):
+        self.store = store
+        self.store.subscribe("perf_hud", self.set_active)
+
+    # --- Builder Setters ---
+
+    def setToggleKey(self, key):
+        self.toggle_key = key
+        self._install_shortcut()
+
+    def setMaxKeys(self, count):
+        self.max_keys = int(count)
+
+    # --- Logic ---
+
+    def set_active(self, active):
+        if isinstance(active, str):
+            active = active.lower() in ("1", "true", "on", "yes")
+        active = bool(active)
+
+        monitor.enable(active)
+        if active:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self.timer.start()
+        else:
+            self.timer.stop()
+            self.hide()
+
+    def toggle(self):
+        active = not self.isVisible()
+        if self.store:
+            self.store.set("perf_hud", active)
+        else:
+            self.set_active(active)
+
+    def refresh(self):
+        snap = monitor.snapshot()
+        lines = [f"input->paint  {snap['input_latency_ms']:6.2f} ms  (max {snap['max_input_latency_ms']:.2f})"]
+
+        for name, s in sorted(snap["paint"].items()):
+            lines.append(f"{name:<14}{s['fps']:>4} fps  {s['avg_ms']:6.2f} ms  (max {s['max_ms']:.2f})")
+
+        top = sorted(snap["notify"].items(), key=lambda kv: kv[1]["count"], reverse=True)
+        for key, n in top[:self.max_keys]:
+            lines.append(f"${key:<20}{n['count']:>6} x{n['max_fanout']}")
+
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self._reposition()
+
+    def _reposition(self):
+        parent = self.parentWidget()
+        if parent:
+            self.move(parent.width() - self.width() - 8, 8)
+
+    def _install_shortcut(self):
+        # Shortcuts on a hidden widget never fire, so bind to the parent instead
+        parent = self.parentWidget()
+        if not parent or not self.toggle_key:
+            return
+        if self.shortcut:
+            self.shortcut.setParent(None)
+        self.shortcut = QShortcut(QKeySequence(self.toggle_key), parent)
+        self.shortcut.setContext(Qt.ShortcutContext.WindowShortcut)
+        self.shortcut.activated.connect(self.toggle)
+
+    # --- Event Overrides ---
+
+    def event(self, event):
+        if event.type() == QEvent.Type.ParentChange:
+            parent = self.parentWidget()
+            if parent:
+                parent.installEventFilter(self)
+                self._install_shortcut()
+        return super().event(event)
+
+    def eventFilter(self, obj, event):
+        if obj is self.parentWidget() and event.type() == QEvent.Type.Resize and self.isVisible():
+            self._reposition()
+        return False
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
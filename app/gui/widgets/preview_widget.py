@@ -1,6 +1,8 @@
 from PyQt6.QtWidgets import QWidget
-from PyQt6.QtGui import QPainter, QPen, QColor
+from PyQt6.QtGui import QPainter, QColor
 from PyQt6.QtCore import Qt, QRectF
+from app.core.perf_monitor import timed_paint
+from app.gui.components.stroke import draw_strokes, strokes_bounds
 
 def main():
     return PreviewWidget()
@@ -29,26 +31,15 @@ class PreviewWidget(QWidget):
         """Calculates the Bounding Box of all points"""
         if not self.strokes:
             return None
-        
-        min_x, min_y = float('inf'), float('inf')
-        max_x, max_y = float('-inf'), float('-inf')
-        has_points = False
 
-        for stroke in self.strokes:
-            for p in stroke:
-                has_points = True
-                if p.x() < min_x: min_x = p.x()
-                if p.x() > max_x: max_x = p.x()
-                if p.y() < min_y: min_y = p.y()
-                if p.y() > max_y: max_y = p.y()
-        
-        if not has_points: return None
+        bounds = strokes_bounds(self.strokes)
+        if bounds is None: return None
         
         # Add a tiny padding so lines don't touch edges
         padding = 10
-        return QRectF(min_x - padding, min_y - padding, 
-                      (max_x - min_x) + padding*2, (max_y - min_y) + padding*2)
+        return bounds.adjusted(-padding, -padding, padding, padding)
 
+    @timed_paint
     def paintEvent(self, event):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
@@ -87,13 +78,6 @@ class PreviewWidget(QWidget):
         painter.translate(-bounds.x(), -bounds.y()) # Move origin to top-left of drawing
 
         # 4. Draw
-        # Use a cosmetic pen (width 0) or fixed width relative to scale?
-        # A width of 2 might look huge if scaled up. 
-        # Let's use 2.0 / scale so it always looks like 2px on screen.
-        pen_width = 2.0 / scale if scale > 0 else 2
-        pen = QPen(Qt.GlobalColor.black, pen_width)
-        painter.setPen(pen)
-
-        for stroke in self.strokes:
-            if len(stroke) > 1:
-                painter.drawPolyline(stroke)
+        # Fill the strokes' cached outlines (shared with the canvas and thumbnails).
+        # A cosmetic 1px edge keeps very small previews readable.
+        draw_strokes(painter, self.strokes, cosmetic_outline=True)
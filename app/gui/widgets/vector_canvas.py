@@ -1,33 +1,232 @@
+import math
+from functools import partial
+
 from PyQt6.QtWidgets import QWidget
-from PyQt6.QtGui import QPainter, QPen, QColor
-from PyQt6.QtCore import Qt, QPoint
+from PyQt6.QtGui import QPainter, QPen, QColor, QInputDevice, QPixmap, QBrush, QPolygonF
+from PyQt6.QtCore import Qt, QPoint, QPointF, QRectF, QLineF, QEvent
+from app.core.perf_monitor import monitor, timed_paint
+from app.core.document_model import DocumentModel
+from app.gui.components.stroke_input import StrokeInput
+from app.gui.components.stroke import Stroke, DEFAULT_WIDTH, draw_strokes, strokes_bounds, split_stroke
+from app.gui.components import gl_stroke_surface
+from app.gui.components.line_layers import LineLayerCache
+from app.gui.components.live_stroke import LiveStroke
+from app.gui.components.segment_index import SegmentGrid
+from app.gui.components.tile_cache import TileCache
+from app.gui.components.auto_pan import AutoPan
+
+TOOLS = ("pen", "eraser", "lasso")
+ERASER_MODES = ("split", "stroke")
+ZOOM_RANGE = (0.05, 8.0)
+WHEEL_ZOOM_STEP = 2 ** 0.25   # Per wheel notch: four notches double the zoom
+MIN_GRID_PX = 6               # Zoomed out, grid cells merge until at least this wide
+MAX_LIVE_SCALE = 4.0          # Cap (x DPR) on the live stroke's raster resolution
 
 def main():
     return VectorCanvas()
 
+def _release_view(store, document, canvas):
+    """A canvas was destroyed: 'canvas ...' commands go to the newest live view left."""
+    if canvas in document.views:
+        document.views.remove(canvas)
+    if store.get("active_canvas_ref") is canvas:
+        store.set("active_canvas_ref", document.views[-1] if document.views else None)
+
 class VectorCanvas(QWidget):
+    """
+    Infinite horizontal drawing surface for the active line.
+
+    A view of the store's DocumentModel: several canvases (also in other
+    windows) can show the same notebook, each with its own offset, zoom and
+    tool, drawing the shared stroke lists in place.
+
+    Workspace properties:
+        predict = true        # draw a predicted segment ahead of the pen
+        predictionMs = 16     # how far ahead to extrapolate
+        penWidth = 2          # base stroke width
+        widthMode = "pressure"  # "pressure", "velocity" or "fixed"
+        backend = "opengl"    # GPU vertex buffers; "opengl-software" forces Mesa llvmpipe
+        onionSkin = 2         # show N previous / next lines faintly
+        onionOpacity = 0.35   # opacity of the nearest neighbours
+        tool = "pen"          # "pen", "eraser" or "lasso" (also 'canvas tool --name=...')
+        eraserMode = "split"  # "split" cuts strokes, "stroke" removes whole strokes
+        eraserSize = 8        # eraser radius, in screen pixels
+        zoom = 1.0            # initial zoom (wheel / pinch / 'canvas zoom --factor=')
+        autoPan = true        # follow the pen: pan left when it nears the right edge
+        panWarnPx = 120       # yellow indicator this close to the edge
+        panEdgePx = 48        # red indicator and pan this close to the edge
+        panDistance = 0.5     # how far one pan moves, as a fraction of the width
+        panMs = 250           # duration of one pan
+    """
     def __init__(self):
         super().__init__()
         self.setMinimumSize(400, 300)
         self.setStyleSheet("background-color: white; border: 1px solid #ccc;")
         
-        self.data_slots = {} 
+        # Standalone until set_state_store() attaches the shared document
+        self.document = DocumentModel()
+        self._lines = self.document.lines  # The lines dict this view last showed
         self.active_index = 0
-        self.current_stroke = []
+        self.live = LiveStroke()  # The stroke being drawn
         self.store = None
+
+        self.pen_width = DEFAULT_WIDTH
+        self.width_mode = "pressure"
+        self._last_sample = None
+
+        # Mouse / tablet samples are batched per frame
+        self.input = StrokeInput(self)
         
-        # Panning State
+        # View: widget position = offset + world position * zoom
         self.offset = QPoint(0, 0)
+        self.zoom = 1.0
         self.grid_spacing = 19
+        self.grid_color = QColor("#e0e0e0")
         self.margin_px = 76 
 
+        # Pre-rendered grid cell, rebuilt when spacing / colour / DPR change
+        self._grid_brush = None
+        self._grid_key = None
+
+        # Optional GPU surface (see setBackend); None means QPainter raster
+        self.gl_surface = None
+
+        # Raster backend: committed ink is blitted from multi-resolution tiles
+        self.tiles = TileCache(self)
+        self.tiles.updated.connect(self.request_paint)
+        self.destroyed.connect(self.tiles.shutdown)
+
+        # Follow-the-pen; panned frames blit cached tiles / GL buffers
+        self.auto_pan = AutoPan(self)
+
+        # Pinch on touchscreens; touchpads send native zoom gestures
+        self.grabGesture(Qt.GestureType.PinchGesture)
+
+        # Onion skin: neighbouring lines blitted from cached raster layers
+        self.onion_skin = 0
+        self.onion_opacity = 0.35
+        self.onion_colors = (QColor("#e53935"), QColor("#43a047"))  # previous, next
+        self.layers = LineLayerCache()
+
+        # Tools: the eraser and lasso hit test through a segment grid of the
+        # active line, built on first use and updated as strokes change
+        self.tool = "pen"
+        self.eraser_mode = "split"
+        self.eraser_radius = 8.0
+        self.index = None
+        self._index_key = None    # (stroke list, revision) the index mirrors
+        self._index_count = 0     # How many of its strokes are indexed
+        self._eraser_pos = None
+        self._erased = False
+        self.lasso = []           # World points of the lasso being drawn
+        self.selection = []       # Strokes picked by the last lasso
+        self.selection_color = QColor("#2196F3")
+
+    @property
+    def data_slots(self):
+        """{ line index: [Stroke] } of the shared document (not a copy)."""
+        return self.document.lines
+
+    @property
+    def line_revisions(self):
+        """Per line, bumped on edits that are not plain appends (shared by every view)."""
+        return self.document.revisions
+
+    # --- Builder Setters ---
+
+    def setPredict(self, enabled):
+        self.input.predict = bool(enabled)
+
+    def setPredictionMs(self, ms):
+        self.input.prediction_ms = float(ms)
+
+    def setBackend(self, backend):
+        backend = str(backend).lower()
+        if backend in ("opengl", "opengl-software"):
+            if backend == "opengl-software":
+                gl_stroke_surface.use_software_gl()
+            if not gl_stroke_surface.gl_available():
+                print("⚠️ OpenGL unavailable, VectorCanvas falls back to the raster backend")
+                return
+            if self.gl_surface is None:
+                self.gl_surface = gl_stroke_surface.GLStrokeSurface(self)
+                self.gl_surface.setGeometry(self.rect())
+                self.gl_surface.show()
+        elif self.gl_surface is not None:
+            self.gl_surface.deleteLater()
+            self.gl_surface = None
+        self.request_paint()
+
+    def setOnionSkin(self, count):
+        self.onion_skin = max(0, int(count))
+        self.layers.max_layers = max(8, self.onion_skin * 2 + 2)
+        self.request_paint()
+
+    def setOnionOpacity(self, opacity):
+        self.onion_opacity = max(0.0, min(1.0, float(opacity)))
+        self.request_paint()
+
+    def setAutoPan(self, enabled):
+        self.auto_pan.enabled = bool(enabled)
+
+    def setPanWarnPx(self, px):
+        self.auto_pan.warn_px = max(0, int(px))
+
+    def setPanEdgePx(self, px):
+        self.auto_pan.edge_px = max(0, int(px))
+
+    def setPanDistance(self, fraction):
+        self.auto_pan.distance = max(0.0, min(1.0, float(fraction)))
+
+    def setPanMs(self, ms):
+        self.auto_pan.duration_ms = max(0, int(ms))
+
+    def setZoom(self, zoom):
+        self.set_zoom(float(zoom))
+
+    def setTool(self, name):
+        self.set_tool(name)
+
+    def setEraserMode(self, mode):
+        self.set_tool(self.tool, mode=mode)
+
+    def setEraserSize(self, size):
+        self.set_tool(self.tool, size=size)
+
+    def request_paint(self):
+        if self.gl_surface is not None:
+            self.gl_surface.update()
+        else:
+            self.update()
+
+    def setGridSpacing(self, spacing):
+        self.grid_spacing = max(2, int(spacing))
+        self.request_paint()
+
+    def setGridColor(self, color):
+        self.grid_color = QColor(color)
+        self.request_paint()
+
+    def setPenWidth(self, width):
+        self.pen_width = float(width)
+
+    def setWidthMode(self, mode):
+        self.width_mode = mode
+
     def set_state_store(self, store):
         self.store = store
         self.store.set("active_canvas_ref", self)
-        
-        existing_data = self.store.get("canvas_data")
-        if existing_data:
-            self.data_slots = existing_data
+
+        # Strokes drawn before the store was attached go into the document
+        local = self.document.lines
+        self.document = DocumentModel.of(store)
+        for index, strokes in local.items():
+            if strokes and not self.document.lines.get(index):
+                self.document.lines[index] = strokes
+        self._lines = self.document.lines
+        if self not in self.document.views:
+            self.document.views.append(self)
+            self.destroyed.connect(partial(_release_view, store, self.document, self))
             
         saved_index = self.store.get("active_line")
         if saved_index is not None:
@@ -36,8 +235,43 @@ class VectorCanvas(QWidget):
         # Only recenter on initial load/reload
         self.recenter_view()
             
-        self.update() 
+        self.request_paint()
         self.publish_state()
+        self.store.subscribe("canvas_data", self.on_canvas_data, owner=self)
+        # Lines edited by any view (ours included): one call per changed line
+        self.store.subscribe_path("canvas_data.*", self.on_line_changed, owner=self)
+
+    def on_canvas_data(self, data):
+        """A whole new document (e.g. 'document load'); the DocumentModel adopted it already."""
+        if self.document.lines is self._lines:
+            return
+        self._lines = self.document.lines
+        self.layers.invalidate()
+        self.index = None
+        self.clear_selection()
+        self.recenter_view()
+        self.request_paint()
+
+    def on_line_changed(self, path, strokes):
+        """A line was edited, possibly by another view of the document."""
+        try:
+            index = int(path.rsplit(".", 1)[1])
+        except ValueError:
+            return
+        if abs(index - self.active_index) > self.onion_skin:
+            return
+        if index == self.active_index and self.selection:
+            # Another view may have erased selected strokes
+            alive = {id(s) for s in strokes or ()}
+            if not all(id(s) in alive for s in self.selection):
+                self.selection = [s for s in self.selection if id(s) in alive]
+                self._publish_selection()
+        self.request_paint()
+
+    def _claim_commands(self):
+        """'canvas ...' commands go to the view that was drawn on last."""
+        if self.store and self.store.get("active_canvas_ref") is not self:
+            self.store.set("active_canvas_ref", self)
 
     # --- NEW: CLI Command Handler ---
     def move_canvas(self, x=0, y=0, animate=False):
@@ -49,24 +283,152 @@ class VectorCanvas(QWidget):
         new_x = self.offset.x() + int(x)
         new_y = self.offset.y() + int(y)
         self.offset = QPoint(new_x, new_y)
-        self.update()
+        self.request_paint()
         # We don't necessarily save offset to store on every frame of animation
         # but for single moves, we can.
+        self.publish_offset()
+
+    def pan_by(self, dx):
+        """One frame of an animated pan (the offset is published when it ends)."""
+        if self.input.active:
+            # Samples captured before the move map through the old offset
+            self._consume_samples(self.input.take())
+        self.offset = QPoint(self.offset.x() + int(dx), self.offset.y())
+        # Ink follows the resting pen across the moving canvas
+        self.input.hold()
+        self.request_paint()
+
+    def publish_offset(self):
         if self.store:
             self.store.set("canvas_offset", (self.offset.x(), self.offset.y()))
 
-    def publish_state(self):
+    # --- Zoom ---
+
+    def to_world(self, pos):
+        """Widget position -> world position."""
+        return QPointF((pos.x() - self.offset.x()) / self.zoom, (pos.y() - self.offset.y()) / self.zoom)
+
+    def visible_world_rect(self):
+        return QRectF(self.to_world(QPointF(0, 0)), self.to_world(QPointF(self.width(), self.height())))
+
+    def set_zoom(self, zoom, anchor=None):
+        """
+        Zooms around 'anchor' (a widget position, default the centre), which
+        stays over the same world point. Called by 'canvas zoom'.
+        """
+        # Rounded so wheel steps land exactly back on 1.0 (whole-pixel grid, exact tiles)
+        zoom = round(max(ZOOM_RANGE[0], min(ZOOM_RANGE[1], zoom)), 6)
+        if zoom == self.zoom:
+            return
+        if anchor is None:
+            anchor = QPointF(self.width() / 2, self.height() / 2)
+        world = self.to_world(anchor)
+        self.zoom = zoom
+        # Whole pixels keep tiles and the grid pixel-aligned
+        self.offset = QPoint(round(anchor.x() - world.x() * zoom), round(anchor.y() - world.y() * zoom))
+        self.request_paint()
+        if self.store:
+            self.store.set("canvas_zoom", self.zoom)
+
+    def zoom_by(self, factor, anchor=None):
+        self.set_zoom(self.zoom * factor, anchor)
+
+    def wheelEvent(self, event):
+        notches = event.angleDelta().y() / 120
+        if notches:
+            self.zoom_by(WHEEL_ZOOM_STEP ** notches, event.position())
+        event.accept()
+
+    def event(self, event):
+        etype = event.type()
+        if etype == QEvent.Type.NativeGesture:
+            if event.gestureType() == Qt.NativeGestureType.ZoomNativeGesture:
+                self.zoom_by(1.0 + event.value(), event.position())
+                return True
+        elif etype == QEvent.Type.Gesture:
+            pinch = event.gesture(Qt.GestureType.PinchGesture)
+            if pinch is not None:
+                if pinch.changeFlags() & pinch.ChangeFlag.ScaleFactorChanged:
+                    self.zoom_by(pinch.scaleFactor(), QPointF(self.mapFromGlobal(pinch.centerPoint().toPoint())))
+                event.accept(pinch)
+                return True
+        return super().event(event)
+
+    def set_tool(self, name, mode=None, size=None):
+        """Switches between pen, eraser and lasso. Called by 'canvas tool --name=...'."""
+        name = str(name).lower()
+        if name not in TOOLS:
+            print(f"⚠️ Unknown canvas tool '{name}' (expected one of {', '.join(TOOLS)})")
+            return
+        if mode is not None:
+            mode = str(mode).lower()
+            if mode not in ERASER_MODES:
+                print(f"⚠️ Unknown eraser mode '{mode}' (expected one of {', '.join(ERASER_MODES)})")
+                return
+            self.eraser_mode = mode
+        if size is not None:
+            self.eraser_radius = max(1.0, float(size))
+
+        if name != self.tool and name != "lasso":
+            self.clear_selection()
+        self.tool = name
+        if name != "pen":
+            self._segment_index()  # Built now rather than on the first drag
+        if self.store:
+            self.store.set("canvas_tool", name)
+
+    def clear_selection(self):
+        if self.selection or self.lasso:
+            self.selection = []
+            self.lasso = []
+            self._publish_selection()
+            self.request_paint()
+
+    def delete_selection(self):
+        """Removes the strokes picked by the lasso. Called by 'canvas delete'."""
+        strokes = self.data_slots.get(self.active_index)
+        if not self.selection or not strokes:
+            return
+        selected = {id(s) for s in self.selection}
+        index = self._segment_index()
+        for stroke in self.selection:
+            index.remove(stroke)
+        strokes[:] = [s for s in strokes if id(s) not in selected]
+        self.selection = []
+        self._line_edited()
+        self._publish_selection()
+        self.request_paint()
+        self.publish_line(self.active_index)
+
+    def _publish_selection(self):
         if self.store:
-            current_data = self.data_slots.get(self.active_index, [])
-            self.store.set("current_strokes", list(current_data))
+            self.store.set("canvas_selection", len(self.selection))
+
+    def publish_state(self):
+        # 'current_strokes' is a computed key over canvas_data / active_line;
+        # the document keeps canvas_data, so this only repairs a detached store
+        if self.store and self.store.get("canvas_data") is not self.data_slots:
             self.store.set("canvas_data", self.data_slots)
 
+    def publish_line(self, index):
+        """
+        Publishes a single line after an in-place edit, so only listeners
+        of 'canvas_data.<index>' (and coarse 'canvas_data' ones) wake up.
+        """
+        if not self.store:
+            return
+        if self.store.get("canvas_data") is not self.data_slots:
+            self.publish_state()
+            return
+        self.document.publish(index)
+
     def setActiveLine(self, index):
         try:
             self.active_index = int(index)
+            self.clear_selection()
             # Re-center when switching context
             self.recenter_view()
-            self.update()
+            self.request_paint()
             self.publish_state()
         except ValueError:
             pass
@@ -74,84 +436,336 @@ class VectorCanvas(QWidget):
     def recenter_view(self):
         center_y = int(self.height() / 2)
         
-        active_strokes = self.data_slots.get(self.active_index, [])
-        
-        if not active_strokes:
-            max_x = 0
-        else:
-            max_x = float('-inf')
-            found_points = False
-            for stroke in active_strokes:
-                for p in stroke:
-                    found_points = True
-                    if p.x() > max_x: max_x = p.x()
-            if not found_points: max_x = 0
+        bounds = strokes_bounds(self.data_slots.get(self.active_index, []))
+        max_x = bounds.right() if bounds is not None else 0
         
-        target_x = self.width() - self.margin_px - max_x
+        target_x = self.width() - self.margin_px - max_x * self.zoom
         self.offset = QPoint(int(target_x), center_y)
 
     def resizeEvent(self, event):
         # Optional: Decide if resize should snap or just keep relative offset
         self.recenter_view()
+        if self.gl_surface is not None:
+            self.gl_surface.setGeometry(self.rect())
         super().resizeEvent(event)
 
+    # --- Input ---
+
+    def _begin_stroke(self, pos, pressure, timestamp):
+        if monitor.enabled: monitor.mark_input()
+        self._claim_commands()
+        self.live.clear()
+        self._last_sample = None
+        self._eraser_pos = None
+        if self.tool == "lasso":
+            self.selection = []
+            self.lasso = []
+        self.input.begin(pos, pressure, timestamp)
+        self.auto_pan.track(pos.x())
+
+    def _extend_stroke(self, pos, pressure, timestamp):
+        if self.input.active:
+            if monitor.enabled: monitor.mark_input()
+            self.input.add(pos, pressure, timestamp)
+            self.auto_pan.track(pos.x())
+
+    def _end_stroke(self):
+        if not self.input.active:
+            return
+        self._consume_samples(self.input.end())
+        self.auto_pan.release()
+        if self.tool == "eraser":
+            self._end_erase()
+        elif self.tool == "lasso":
+            self._end_lasso()
+        elif len(self.live):
+            # Committed strokes tessellate their outline once and cache it
+            stroke = Stroke(self.live.points(), self.live.widths())
+            self.document.line(self.active_index).append(stroke)
+            self.live.clear()
+            # Note: No recenter_view() here anymore!
+            self.request_paint()
+            self.publish_line(self.active_index)
+
+    def _consume_samples(self, samples):
+        """Converts buffered widget-space samples into world points."""
+        ox, oy, zoom = self.offset.x(), self.offset.y(), self.zoom
+        if self.tool == "eraser":
+            for sample in samples:
+                self._erase_to((sample.x - ox) / zoom, (sample.y - oy) / zoom)
+            return
+        if self.tool == "lasso":
+            self.lasso.extend(QPointF((sample.x - ox) / zoom, (sample.y - oy) / zoom) for sample in samples)
+            return
+
+        live = self.live
+        for sample in samples:
+            # Zoomed in, points keep sub-unit precision (a screen pixel is < 1 world unit)
+            live.append(round((sample.x - ox) / zoom, 2), round((sample.y - oy) / zoom, 2),
+                        self._sample_width(sample))
+            self._last_sample = sample
+
+    # --- Eraser / Lasso ---
+
+    def _segment_index(self):
+        """The segment grid of the active line, caught up with appended strokes."""
+        strokes = self.document.line(self.active_index)
+        revision = self.document.revision(self.active_index)
+        key = self._index_key
+        if (self.index is None or key[0] is not strokes or key[1] != revision
+                or len(strokes) < self._index_count):
+            self.index = SegmentGrid()
+            self._index_key = (strokes, revision)
+            self._index_count = 0
+        for stroke in strokes[self._index_count:]:
+            self.index.add(stroke)
+        self._index_count = len(strokes)
+        return self.index
+
+    def _line_edited(self):
+        """After strokes of the active line were removed or replaced in place."""
+        index = self.active_index
+        strokes = self.data_slots.get(index, [])
+        # Published when the gesture ends (publish_line); other views rebuild then
+        revision = self.document.edited(index, publish=False)
+        self.layers.invalidate(index)
+        # The segment grid was updated alongside the edit: keep it
+        self._index_key = (strokes, revision)
+        self._index_count = len(strokes)
+
+    def _erase_to(self, x, y):
+        """Erases along the segment from the previous eraser position, in radius-sized steps."""
+        prev = self._eraser_pos
+        self._eraser_pos = QPointF(x, y)
+        if prev is None:
+            self._erase_at(x, y)
+            return
+        dx, dy = x - prev.x(), y - prev.y()
+        steps = max(1, int((dx * dx + dy * dy) ** 0.5 * self.zoom / self.eraser_radius))
+        for step in range(1, steps + 1):
+            self._erase_at(prev.x() + dx * step / steps, prev.y() + dy * step / steps)
+
+    def _erase_at(self, x, y):
+        index = self._segment_index()
+        hits = index.hit(x, y, self.eraser_radius / self.zoom)
+        if not hits:
+            return
+
+        replaced = {}
+        for stroke, segments, points in hits:
+            index.remove(stroke)
+            pieces = [] if self.eraser_mode == "stroke" else split_stroke(stroke, segments, points)
+            for piece in pieces:
+                index.add(piece)
+            replaced[id(stroke)] = pieces
+
+        strokes = self.data_slots[self.active_index]
+        strokes[:] = [piece for s in strokes for piece in replaced.get(id(s), (s,))]
+        if self.selection:
+            self.selection = [s for s in self.selection if id(s) not in replaced]
+        self._line_edited()
+        self._erased = True
+
+    def _end_erase(self):
+        self._eraser_pos = None
+        self.request_paint()
+        if self._erased:
+            self._erased = False
+            self._publish_selection()
+            self.publish_line(self.active_index)
+
+    def _end_lasso(self):
+        if len(self.lasso) > 2:
+            self.selection = self._segment_index().inside(QPolygonF(self.lasso))
+        self.lasso = []
+        self._publish_selection()
+        self.request_paint()
+
+    def _sample_width(self, sample):
+        if self.width_mode == "pressure":
+            # Mouse input reports pressure 1.0, i.e. the base width
+            return self.pen_width * (0.25 + 0.75 * sample.pressure)
+
+        if self.width_mode == "velocity" and self._last_sample is not None:
+            prev = self._last_sample
+            dt = max(sample.t - prev.t, 1)
+            speed = ((sample.x - prev.x) ** 2 + (sample.y - prev.y) ** 2) ** 0.5 / dt  # px per ms
+            return self.pen_width * max(0.4, min(1.4, 1.4 - 0.5 * speed))
+
+        return self.pen_width
+
+    @staticmethod
+    def _is_touch(event):
+        # Fingers are ignored so a resting palm does not draw
+        device = event.device()
+        return device is not None and device.type() == QInputDevice.DeviceType.TouchScreen
+
+    def tabletEvent(self, event):
+        etype = event.type()
+        if etype == QEvent.Type.TabletPress:
+            if event.button() == Qt.MouseButton.LeftButton:
+                self._begin_stroke(event.position(), event.pressure(), event.timestamp())
+        elif etype == QEvent.Type.TabletMove:
+            self._extend_stroke(event.position(), event.pressure(), event.timestamp())
+        elif etype == QEvent.Type.TabletRelease:
+            self._end_stroke()
+        # Accepting prevents Qt from synthesizing duplicate mouse events
+        event.accept()
+
     def mousePressEvent(self, event):
+        if self._is_touch(event): return
         if event.button() == Qt.MouseButton.LeftButton:
-            world_pos = event.pos() - self.offset
-            self.current_stroke = [world_pos]
-            self.update()
+            self._begin_stroke(event.position(), 1.0, event.timestamp())
 
     def mouseMoveEvent(self, event):
-        if self.current_stroke:
-            world_pos = event.pos() - self.offset
-            self.current_stroke.append(world_pos)
-            self.update()
+        if self._is_touch(event): return
+        self._extend_stroke(event.position(), 1.0, event.timestamp())
 
     def mouseReleaseEvent(self, event):
-        if event.button() == Qt.MouseButton.LeftButton and self.current_stroke:
-            self.data_slots.setdefault(self.active_index, []).append(self.current_stroke)
-            self.current_stroke = []
-            # Note: No recenter_view() here anymore!
-            self.update()
-            self.publish_state()
+        if self._is_touch(event): return
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._end_stroke()
+
+    def _grid_step(self):
+        """Grid spacing on screen, in px: cells merge in pairs while zoomed out."""
+        step = self.grid_spacing * self.zoom
+        while step < MIN_GRID_PX:
+            step *= 2
+        return step
+
+    def _grid_pattern(self, size):
+        dpr = self.devicePixelRatioF()
+        key = (size, self.grid_color.rgba(), dpr)
+        if key != self._grid_key:
+            tile = QPixmap(round(size * dpr), round(size * dpr))
+            tile.setDevicePixelRatio(dpr)
+            tile.fill(Qt.GlobalColor.transparent)
+
+            # One cell: its left and top grid line
+            p = QPainter(tile)
+            p.setPen(QPen(self.grid_color, 1))
+            p.drawLine(0, 0, 0, size)
+            p.drawLine(0, 0, size, 0)
+            p.end()
+
+            self._grid_brush = QBrush(tile)
+            self._grid_key = key
+        return self._grid_brush
 
     def _draw_grid(self, painter):
-        painter.setPen(QPen(QColor("#e0e0e0"), 1))
-        
-        left = -self.offset.x()
-        top = -self.offset.y()
-        right = left + self.width()
-        bottom = top + self.height()
+        """
+        Grid and red baseline in widget coordinates: one textured fill aligned
+        to the offset, plus one rect for the baseline. At zoom levels where a
+        cell is not a whole number of pixels the lines are drawn one by one
+        with a cosmetic pen instead, so they stay 1px and do not drift.
+        """
+        painter.save()
+        step = self._grid_step()
+        if step.is_integer():
+            painter.setBrushOrigin(QPointF(self.offset))
+            painter.fillRect(self.rect(), self._grid_pattern(int(step)))
+        else:
+            w, h = self.width(), self.height()
+            lines = []
+            x = self.offset.x() % step
+            while x < w:
+                lines.append(QLineF(x, 0, x, h))
+                x += step
+            y = self.offset.y() % step
+            while y < h:
+                lines.append(QLineF(0, y, w, y))
+                y += step
+            painter.setPen(QPen(self.grid_color, 0))
+            painter.drawLines(lines)
+        painter.fillRect(0, self.offset.y() - 1, self.width(), 2, Qt.GlobalColor.red)
+        painter.restore()
+
+    def _draw_onion_skin(self, painter):
+        """Neighbouring lines, fading with distance (world-transformed painter)."""
+        if not self.onion_skin:
+            return
+        # Layers are rendered per power-of-two zoom, so zoom steps within an octave reuse them
+        dpr = self.devicePixelRatioF() * 2 ** math.ceil(math.log2(self.zoom))
+        for distance in range(self.onion_skin, 0, -1):
+            opacity = self.onion_opacity * (self.onion_skin - distance + 1) / self.onion_skin
+            for index, color in ((self.active_index - distance, self.onion_colors[0]),
+                                 (self.active_index + distance, self.onion_colors[1])):
+                strokes = self.data_slots.get(index)
+                if not strokes:
+                    continue
+                painter.setOpacity(opacity)
+                layer = self.layers.layer(index, strokes, color, dpr, self.line_revisions.get(index, 0))
+                if layer is not None:
+                    painter.drawImage(layer[1], layer[0])
+                else:
+                    draw_strokes(painter, strokes, color)
+        painter.setOpacity(1.0)
+
+    def _draw_overlays(self, painter):
+        """Per-frame content on top of committed ink (world-transformed painter)."""
+        if self.selection:
+            draw_strokes(painter, self.selection, self.selection_color)
+
+        # Only segments added since the last frame are rasterised
+        dpr = self.devicePixelRatioF()
+        self.live.draw(painter, dpr * min(self.zoom, MAX_LIVE_SCALE))
 
-        first_x = int(left - (left % self.grid_spacing))
-        first_y = int(top - (top % self.grid_spacing))
+        if len(self.lasso) > 1:
+            pen = QPen(self.selection_color, 1, Qt.PenStyle.DashLine)
+            pen.setCosmetic(True)
+            painter.setPen(pen)
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.drawPolygon(QPolygonF(self.lasso))
 
-        for x in range(first_x, int(right) + self.grid_spacing, self.grid_spacing):
-            painter.drawLine(x, int(top), x, int(bottom))
+        if self._eraser_pos is not None and self.input.active:
+            painter.setPen(QPen(QColor(0, 0, 0, 120), 0))
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            radius = self.eraser_radius / self.zoom
+            painter.drawEllipse(self._eraser_pos, radius, radius)
+
+        predicted = self.input.predicted_point()
+        if predicted is not None and len(self.live):
+            painter.setPen(QPen(QColor(0, 0, 0, 90), 2))
+            painter.drawLine(self.live.last_point(), self.to_world(predicted))
+
+    def _draw_screen_overlays(self, painter):
+        """Widget-space indicators, drawn last."""
+        painter.resetTransform()
+        self.auto_pan.draw(painter)
+
+    def world_transform(self, painter):
+        painter.translate(self.offset)
+        painter.scale(self.zoom, self.zoom)
 
-        for y in range(first_y, int(bottom) + self.grid_spacing, self.grid_spacing):
-            painter.drawLine(int(left), y, int(right), y)
+    def _begin_frame(self):
+        # Every sample received since the last frame lands in this one paint
+        if self.input.active:
+            self._consume_samples(self.input.take())
 
+    def _end_frame(self):
+        if monitor.enabled: monitor.mark_input_painted()
+
+    @timed_paint
     def paintEvent(self, event):
+        if self.gl_surface is not None:
+            return  # The GL surface covers the widget and paints everything
+
+        self._begin_frame()
+
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.translate(self.offset)
         self._draw_grid(painter)
 
-        left_bound = -self.offset.x()
-        right_bound = -self.offset.x() + self.width()
-        
-        red_pen = QPen(Qt.GlobalColor.red, 2)
-        painter.setPen(red_pen)
-        painter.drawLine(int(left_bound), 0, int(right_bound), 0)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.world_transform(painter)
+        self._draw_onion_skin(painter)
 
-        black_pen = QPen(Qt.GlobalColor.black, 2)
-        painter.setPen(black_pen)
+        # Committed strokes: tiles at this zoom, refined in the background
+        index = self.active_index
+        self.tiles.sync(self.data_slots.get(index, []), self.line_revisions.get(index, 0))
+        self.tiles.paint(painter, self.visible_world_rect(), self.zoom * self.devicePixelRatioF())
 
-        active_strokes = self.data_slots.get(self.active_index, [])
-        for stroke in active_strokes:
-            if len(stroke) > 1:
-                painter.drawPolyline(stroke)
+        self._draw_overlays(painter)
+        self._draw_screen_overlays(painter)
+        painter.end()
 
-        if len(self.current_stroke) > 1:
-            painter.drawPolyline(self.current_stroke)
+        self._end_frame()
@@ -0,0 +1,123 @@
+"""
+Headless commands (no widgets, no window system).
+
+    python main.py render notes.jdraw --out=previews --size=320x240
+    python main.py render notes.jdraw --out=previews --lines=0,2-4 --scale=2
+
+Writes one PNG per non-empty line (line_0001.png, ...), fitted and centered
+like the line thumbnails, using the same stroke outlines as the canvas.
+
+    python main.py send "state get --key=count" "canvas move --x=50 --y=0"
+    python main.py send --name=johndraw < script.jdcmd
+
+Sends commands to a running app started with --serve and prints one JSON
+reply per command. All commands are written before any reply is read.
+"""
+import argparse
+import os
+import sys
+import time
+
+
+def parse_size(text):
+    w, h = (int(v) for v in text.lower().split("x"))
+    if w <= 0 or h <= 0:
+        raise ValueError(text)
+    return w, h
+
+
+def render(argv):
+    parser = argparse.ArgumentParser(prog="main.py render", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("document")
+    parser.add_argument("--out", default=".")
+    parser.add_argument("--size", default="320x240", type=parse_size)
+    parser.add_argument("--lines", default="all")
+    parser.add_argument("--scale", default=1.0, type=float, help="device pixel ratio of the output")
+    parser.add_argument("--margin", default=10, type=int)
+    parser.add_argument("--background", default="white")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+
+    # No QApplication: painting into a QImage needs no platform, but if
+    # anything does touch one it must not try to reach a display.
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from app.core import document
+    try:
+        payloads = document.load_payload(args.document)
+    except (OSError, ValueError) as e:
+        print(f"❌ Render Error: {e}", file=sys.stderr)
+        return 1
+
+    from app.gui.components.thumbnail_renderer import render_thumbnail
+
+    try:
+        indices = document.parse_lines(args.lines, payloads.keys())
+    except ValueError as e:
+        print(f"❌ Render Error: {e}", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.out, exist_ok=True)
+    width, height = args.size
+    written = 0
+    for index in indices:
+        strokes = document.strokes_from_payload(payloads[index])
+        image = render_thumbnail(strokes, width, height, args.scale, args.margin, args.background)
+        if image is None:
+            continue
+        path = os.path.join(args.out, f"line_{index + 1:04d}.png")
+        if not image.save(path):
+            print(f"❌ Render Error: could not write {path}", file=sys.stderr)
+            return 1
+        written += 1
+
+    print(f"Rendered {written} lines to {args.out} in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return 0
+
+
+def send(argv):
+    parser = argparse.ArgumentParser(prog="main.py send", description="Sends commands to 'main.py --serve'.")
+    parser.add_argument("commands", nargs="*", help="commands to send (default: read lines from stdin)")
+    parser.add_argument("--name", default=None, help="server name given to --serve")
+    parser.add_argument("--timeout", default=5.0, type=float, help="seconds to wait for the replies")
+    args = parser.parse_args(argv)
+
+    from PyQt6.QtNetwork import QLocalSocket
+    from app.gui.components.command_server import DEFAULT_NAME
+
+    lines = args.commands or [line for line in sys.stdin.read().splitlines() if line.strip()]
+    if not lines:
+        return 0
+
+    sock = QLocalSocket()
+    sock.connectToServer(args.name or DEFAULT_NAME)
+    if not sock.waitForConnected(int(args.timeout * 1000)):
+        print(f"❌ Send Error: {sock.errorString()}", file=sys.stderr)
+        return 1
+
+    # Pipelined: the server batches whatever arrives together
+    sock.write(("\n".join(lines) + "\n").encode("utf-8"))
+    sock.flush()
+
+    received, failed = b"", False
+    deadline = time.monotonic() + args.timeout
+    replies = 0
+    while replies < len(lines):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not sock.waitForReadyRead(int(remaining * 1000)):
+            print(f"❌ Send Error: {len(lines) - replies} replies missing", file=sys.stderr)
+            failed = True
+            break
+        received += bytes(sock.readAll())
+        replies = received.count(b"\n")
+
+    for line in received.decode("utf-8").splitlines():
+        print(line)
+        failed = failed or '"ok": false' in line
+    sock.disconnectFromServer()
+    return 1 if failed else 0
+
+
+COMMANDS = {"render": render, "send": send}
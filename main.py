@@ -1,3 +1,6 @@
+import time
+_T0 = time.perf_counter()
+
 import sys
 import os
 
@@ -6,21 +9,45 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
-# DEBUG: Check where PyQt6 is coming from
-try:
-    import PyQt6
-    print(f"DEBUG: PyQt6 loaded from: {PyQt6.__file__}")
-except ImportError:
-    print("CRITICAL: PyQt6 not found in main.py environment!")
 
-from PyQt6.QtWidgets import QApplication
-from app.gui.main_window import MainWindow
+def run_gui(argv):
+    from app.core.perf_monitor import startup
+    if "--profile-startup" in argv:
+        argv = [a for a in argv if a != "--profile-startup"]
+        startup.enable(_T0)
+    # --serve[=name]: accept commands from other processes ('main.py send')
+    serve = next((a for a in argv if a == "--serve" or a.startswith("--serve=")), None)
+    if serve:
+        argv = [a for a in argv if a != serve]
 
-def main():
-    app = QApplication(sys.argv)
-    window = MainWindow()
-    window.show()
+    with startup.phase("import PyQt6.QtWidgets"):
+        try:
+            from PyQt6.QtWidgets import QApplication
+        except ImportError:
+            print("CRITICAL: PyQt6 not found in main.py environment!")
+            sys.exit(1)
+    with startup.phase("import MainWindow"):
+        from app.gui.main_window import MainWindow
+
+    with startup.phase("QApplication"):
+        app = QApplication(argv)
+    with startup.phase("MainWindow shell"):
+        # The first workspace is built after the shell's first paint
+        window = MainWindow()
+        window.show()
+    if serve:
+        window.switcher.serve(serve.partition("=")[2] or None)
     sys.exit(app.exec())
 
+
+def main():
+    # Headless commands (e.g. 'render') never import QtWidgets
+    if len(sys.argv) > 1 and not sys.argv[1].startswith("-"):
+        from app.headless import COMMANDS
+        command = COMMANDS.get(sys.argv[1])
+        if command:
+            sys.exit(command(sys.argv[2:]))
+    run_gui(sys.argv)
+
 if __name__ == "__main__":
     main()
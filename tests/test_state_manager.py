@@ -0,0 +1,31 @@
+from app.core.state_manager import StateStore
+
+
+def test_computed_key_is_current_inside_transaction():
+    store = StateStore()
+    store.set("lines", {0: ["a"], 1: ["b", "c"]})
+    store.set("active_line", 0)
+    store.define_computed("current_strokes", lambda get: get("lines")[get("active_line")])
+    seen = []
+    store.subscribe("current_strokes", seen.append)
+
+    with store.transaction():
+        store.set("active_line", 1)
+        assert store.get("current_strokes") == ["b", "c"]
+        assert seen == [["a"]]  # Listeners wait for the end of the transaction
+
+    assert seen == [["a"], ["b", "c"]]
+
+
+def test_computed_key_hides_plain_value():
+    store = StateStore()
+    store.set("status", "System Ready")
+    store.set("count", 3)
+    store.define_computed("status", lambda get: f"{get('count')} strokes")
+
+    assert store.get("status") == "3 strokes"
+    store.set("count", 4)
+    assert store.get("status") == "4 strokes"
+
+    store.remove_computed("status")
+    assert store.get("status") == "System Ready"
@@ -0,0 +1,87 @@
+"""
+Frame-time benchmark for the VectorCanvas backends.
+
+    python tools/bench_canvas.py --strokes=400 --points=150 --frames=200
+    python tools/bench_canvas.py --software-gl      # force Mesa llvmpipe
+
+GPU-less CI (needs an X server for GL; offscreen has no GL context):
+    xvfb-run -a python tools/bench_canvas.py --software-gl
+
+Each frame pans the canvas by one pixel and renders it into memory
+(grab() for raster, grabFramebuffer() for OpenGL).
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_strokes(count, points):
+    from PyQt6.QtCore import QPoint
+    from app.gui.components.stroke import Stroke
+
+    rng = random.Random(7)
+    strokes = []
+    for i in range(count):
+        x0, y0 = -i * 12, rng.randint(-200, 200)
+        pts = [QPoint(int(x0 + k * 2), int(y0 + 30 * math.sin(k / 9.0))) for k in range(points)]
+        widths = [1.0 + 2.0 * rng.random() for _ in pts]
+        strokes.append(Stroke(pts, widths))
+    return strokes
+
+
+def run(canvas, frames, grab):
+    grab()  # Warm-up: caches, shaders, first upload
+    start = time.perf_counter()
+    for _ in range(frames):
+        canvas.move_canvas(1, 0)
+        grab()
+    return (time.perf_counter() - start) * 1000.0 / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strokes", type=int, default=400)
+    parser.add_argument("--points", type=int, default=150)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--software-gl", action="store_true")
+    args = parser.parse_args()
+
+    from app.gui.components import gl_stroke_surface
+    if args.software_gl:
+        gl_stroke_surface.use_software_gl()
+
+    from PyQt6.QtWidgets import QApplication
+    from app.gui.widgets.vector_canvas import VectorCanvas
+
+    app = QApplication(sys.argv)
+    w, h = (int(v) for v in args.size.lower().split("x"))
+    strokes = make_strokes(args.strokes, args.points)
+
+    canvas = VectorCanvas()
+    canvas.resize(w, h)
+    canvas.document.lines[0] = strokes
+    canvas.show()
+    app.processEvents()
+
+    print(f"{args.strokes} strokes x {args.points} points, {w}x{h}, {args.frames} frames")
+    print(f"raster   {run(canvas, args.frames, canvas.grab):8.3f} ms/frame")
+
+    if not gl_stroke_surface.gl_available():
+        print("opengl   unavailable on this platform (try xvfb-run with --software-gl)")
+        return
+
+    canvas.setBackend("opengl")
+    app.processEvents()
+    surface = canvas.gl_surface
+    print(f"opengl   {run(canvas, args.frames, surface.grabFramebuffer):8.3f} ms/frame"
+          f"{'  (llvmpipe)' if args.software_gl else ''}")
+
+
+if __name__ == "__main__":
+    main()